@@ -0,0 +1,44 @@
+"""Add (created_at, id) indexes for keyset pagination
+
+Revision ID: 5c2f8d4e7a91
+Revises: a1eee3a0bbe5
+Create Date: 2026-10-18 15:40:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5c2f8d4e7a91"
+down_revision: Union[str, None] = "a1eee3a0bbe5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_organizations_created_at_id",
+        "organizations",
+        ["created_at", "id"],
+        unique=False,
+        schema="public",
+    )
+    op.create_index(
+        "ix_users_created_at_id",
+        "users",
+        ["created_at", "id"],
+        unique=False,
+        schema="public",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_created_at_id", table_name="users", schema="public")
+    op.drop_index(
+        "ix_organizations_created_at_id", table_name="organizations", schema="public"
+    )
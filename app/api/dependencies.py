@@ -1,56 +1,165 @@
 from __future__ import annotations
 
-from typing import Annotated
+import logging
+import math
+from typing import Annotated, Awaitable, Callable, List, Optional, Type
 
-from fastapi import Depends, Request, HTTPException, status
+from fastapi import Depends, Query, Request, HTTPException, status
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from clerk_backend_api import RequestState
 
+from app.core.auth import TokenVerificationError, get_session_token, token_verifier
+from app.core.clients import clients
+from app.core.rate_limit import (
+    ANONYMOUS_TIER,
+    RateLimitExceeded,
+    rate_limiter,
+)
 from app.managers.clerk_manager import ClerkManager
+from app.managers.organization_manager import OrganizationManager
+from app.managers.user_manager import UserManager
 from app.schemas.user import UserResponse
+from app.services.loaders import Loaders
 from app.services.user import UserService
-from app.db.session import get_db_session
+from app.db.session import get_db_session, get_read_db_session
+from app.utils.fields import InvalidFieldsError, parse_fields
+
+logger = logging.getLogger(__name__)
 
 
 DBSessionDep = Annotated[AsyncSession, Depends(get_db_session)]
+# Read-only session, served by a read replica when one is fresh enough
+ReadDBSessionDep = Annotated[AsyncSession, Depends(get_read_db_session)]
+
+
+async def get_clerk_manager() -> ClerkManager:
+    """Provide a ClerkManager backed by the shared Clerk client."""
+    return ClerkManager(clients.clerk)
+
+
+ClerkManagerDep = Annotated[ClerkManager, Depends(get_clerk_manager)]
+
+
+async def get_user_manager(
+    db: DBSessionDep, clerk_manager: ClerkManagerDep
+) -> UserManager:
+    """Provide a UserManager bound to the request's database session."""
+    return UserManager(db, clerk_manager)
+
+
+async def get_organization_manager(db: DBSessionDep) -> OrganizationManager:
+    """Provide an OrganizationManager bound to the request's database session."""
+    return OrganizationManager(db)
+
+
+async def get_read_user_manager(
+    db: ReadDBSessionDep, clerk_manager: ClerkManagerDep
+) -> UserManager:
+    """Provide a UserManager for reads, bound to a read-only session."""
+    return UserManager(db, clerk_manager)
+
+
+async def get_read_organization_manager(
+    db: ReadDBSessionDep,
+) -> OrganizationManager:
+    """Provide an OrganizationManager for reads, bound to a read-only session."""
+    return OrganizationManager(db)
+
+
+UserManagerDep = Annotated[UserManager, Depends(get_user_manager)]
+OrganizationManagerDep = Annotated[
+    OrganizationManager, Depends(get_organization_manager)
+]
+ReadUserManagerDep = Annotated[UserManager, Depends(get_read_user_manager)]
+ReadOrganizationManagerDep = Annotated[
+    OrganizationManager, Depends(get_read_organization_manager)
+]
+
+
+async def get_user_service(user_manager: UserManagerDep) -> UserService:
+    return UserService(user_manager)
+
+
+async def get_read_user_service(user_manager: ReadUserManagerDep) -> UserService:
+    return UserService(user_manager)
+
+
+UserServiceDep = Annotated[UserService, Depends(get_user_service)]
+ReadUserServiceDep = Annotated[UserService, Depends(get_read_user_service)]
+
+
+async def get_loaders(db: ReadDBSessionDep) -> Loaders:
+    """Provide DataLoaders scoped to the current request."""
+    return Loaders(db)
+
+
+LoadersDep = Annotated[Loaders, Depends(get_loaders)]
+
+
+def sparse_fields(
+    schema: Type[BaseModel],
+) -> Callable[[Optional[str]], Awaitable[Optional[List[str]]]]:
+    """Build a dependency parsing the `fields` query parameter against a schema.
+
+    The dependency resolves to the requested field names, or None to return
+    every field.
+    """
+
+    async def dependency(
+        fields: Optional[str] = Query(
+            None, description="Comma-separated list of fields to return"
+        ),
+    ) -> Optional[List[str]]:
+        try:
+            return parse_fields(fields, schema)
+        except InvalidFieldsError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return dependency
 
 
 async def verify_auth_request(
     request: Request,
 ) -> str:
-    """Verify the request authentication using Clerk. Returns Clerk User ID."""
-    try:
-        clerk_manager = ClerkManager()
-        auth: RequestState = clerk_manager.authenticate_request(request)
-        if not auth.is_signed_in or not auth.payload:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not signed in or payload missing",
-            )
-
-        clerk_id: str | None = auth.payload.get("sub")
-        if not clerk_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Clerk User ID (sub) missing from token payload",
-            )
-        return clerk_id
+    """Verify the request's Clerk session token. Returns Clerk User ID."""
+    token = get_session_token(request)
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Session token missing",
+        )
 
-    except Exception as e:
-        print(f"Authentication failed: {str(e)}")
+    try:
+        claims = await token_verifier.verify(token)
+    except TokenVerificationError as e:
+        logger.info("Authentication failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Authentication failed",
         )
 
+    clerk_id: str | None = claims.get("sub")
+    if not clerk_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Clerk User ID (sub) missing from token payload",
+        )
+    return clerk_id
+
 
 async def get_current_user(
-    db: DBSessionDep,
+    read_user_service: ReadUserServiceDep,
+    user_service: UserServiceDep,
     clerk_id: str = Depends(verify_auth_request),
 ) -> UserResponse:
-    """Get the current authenticated user from DB using Clerk ID."""
-    user_service = UserService()
-    user = await user_service.get_user(clerk_id=clerk_id)
+    """Get the current authenticated user from DB using Clerk ID.
+
+    The user is read from a replica; a user created too recently to have
+    replicated yet is looked up on the primary.
+    """
+    user = await read_user_service.get_user(clerk_id=clerk_id)
+    if not user:
+        user = await user_service.get_user(clerk_id=clerk_id)
 
     if not user:
         raise HTTPException(
@@ -59,3 +168,39 @@ async def get_current_user(
         )
 
     return user
+
+
+async def rate_limit(
+    request: Request, organization_manager: ReadOrganizationManagerDep
+) -> None:
+    """Apply the rate limit of the caller's tier.
+
+    Authenticated callers are limited per Clerk user at their best
+    organization plan; anyone else (including failed authentication) is
+    limited per client IP at the anonymous tier. Behind Railway's proxy the
+    client IP comes from X-Forwarded-For (uvicorn runs with
+    ``--proxy-headers``); otherwise every caller would share the proxy's.
+    """
+    key = f"ip:{request.client.host if request.client else 'unknown'}"
+    tier = ANONYMOUS_TIER
+    token = get_session_token(request)
+    if token:
+        try:
+            claims = await token_verifier.verify(token)
+        except TokenVerificationError:
+            claims = {}
+        clerk_id = claims.get("sub")
+        if clerk_id:
+            key = f"user:{clerk_id}"
+            tier = await rate_limiter.plan_for(
+                clerk_id, organization_manager.get_plans_by_clerk_id
+            )
+
+    try:
+        rate_limiter.hit(key, tier)
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too Many Requests",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
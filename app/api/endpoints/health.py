@@ -1,12 +1,27 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response, status
 
 from app.schemas.health import HealthResponse
-from app.services.health import HealthService
+from app.services.health import health_service
 
 router = APIRouter()
 
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check() -> HealthResponse:
-    health_service = HealthService()
+    """Dependency health; always 200 so it can be polled for status."""
     return await health_service.check_health()
+
+
+@router.get("/livez")
+async def liveness() -> dict[str, str]:
+    """Liveness probe: the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@router.get("/readyz", response_model=HealthResponse)
+async def readiness(response: Response) -> HealthResponse:
+    """Readiness probe: 503 unless every dependency is healthy."""
+    health = await health_service.check_health()
+    if health.status != "healthy":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return health
@@ -1,17 +1,29 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.future import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 
-from app.api.dependencies import get_current_user, DBSessionDep
+from app.api.dependencies import (
+    get_current_user,
+    OrganizationManagerDep,
+    ReadOrganizationManagerDep,
+    sparse_fields,
+)
+from app.core.membership import membership_index
+from app.managers.organization_manager import (
+    SERVER_MANAGED_FIELDS,
+    load_memberships,
+)
 from app.schemas.organization import (
     OrganizationCreate,
     OrganizationResponse,
     OrganizationUpdate,
 )
+from app.schemas.pagination import Page
 from app.schemas.user import UserResponse
-from app.models.organization import Organization as OrganizationModel
+from app.utils.cache import response_cache
+from app.utils.fields import sparse_json, sparse_page_json
+from app.utils.pagination import InvalidCursorError
 
 router = APIRouter(prefix="/organizations", tags=["organizations"])
 
@@ -19,128 +31,119 @@ router = APIRouter(prefix="/organizations", tags=["organizations"])
 @router.post("", response_model=OrganizationResponse)
 async def create_organization(
     organization_create: OrganizationCreate,
-    db: DBSessionDep,
+    organization_manager: OrganizationManagerDep,
     current_user: UserResponse = Depends(get_current_user),
 ) -> OrganizationResponse:
-    """Create a new organization."""
-    # This endpoint likely needs significant rework to use SQLAlchemy session
-    # For now, just adding type hint and fixing NameError
-    # Replace below with SQLAlchemy logic
-    # organization_manager = OrganizationManager()
-    # organization, error = await organization_manager.create_organization(
-    #     organization_create, current_user.id
-    # )
-    # if error:
-    #     raise HTTPException(status_code=400, detail=error.get("error"))
-    # return OrganizationResponse.model_validate(organization) # Assuming manager returns model
-
-    # Placeholder logic just to fix type error for now
-    # TODO: Replace with actual SQLAlchemy create logic using db session
-    org_model = OrganizationModel(**organization_create.model_dump(), plan="free")
-    db.add(org_model)  # Example add
-    await db.flush()  # Example flush to get potential defaults
-    await db.refresh(org_model)  # Example refresh
-    # NOTE: This doesn't handle organization_members yet!
-
-    # Simulate error handling path for completeness
-    error = None  # Placeholder
-    if error:
-        raise HTTPException(status_code=400, detail=error)
-
-    return OrganizationResponse.model_validate(
-        org_model
-    )  # Return validated Pydantic model
-
-
-@router.get("", response_model=List[OrganizationResponse])
+    """Create a new organization with the current user as its admin."""
+    organization, error = await organization_manager.create_organization(
+        organization_create, current_user.id
+    )
+    if error or not organization:
+        detail = error.get("error") if error else "Failed to create organization"
+        raise HTTPException(status_code=400, detail=detail)
+
+    return OrganizationResponse.model_validate(organization)
+
+
+@router.get("", response_model=Page[OrganizationResponse])
 async def get_user_organizations(
-    db: DBSessionDep,
+    organization_manager: ReadOrganizationManagerDep,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = Depends(sparse_fields(OrganizationResponse)),
     current_user: UserResponse = Depends(get_current_user),
-) -> List[OrganizationResponse]:
-    """Get organizations for the current user."""
-    # This endpoint likely needs significant rework to use SQLAlchemy session
-    # For now, just adding type hint
-    # Replace below with SQLAlchemy logic using db session and relationships
-    # user_manager = UserManager()
-    # organizations = await user_manager.get_user_organizations(current_user.id)
-    # return [OrganizationResponse.model_validate(org) for org in organizations]
-
-    # Placeholder logic
-    # TODO: Replace with actual SQLAlchemy query logic
-    return []  # Return empty list for now
+) -> Response:
+    """Get a page of organizations for the current user.
+
+    Pass the returned `next_cursor` as `cursor` to fetch the following page.
+    """
+    # The page is also tagged with each listed organization once rendered
+    tags = [f"member:{current_user.id}"]
+
+    async def render() -> str:
+        try:
+            organizations, next_cursor = (
+                await organization_manager.get_user_organizations_page(
+                    current_user.id, limit=limit, cursor=cursor, fields=fields
+                )
+            )
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        tags.extend(f"org:{org.id}" for org in organizations)
+
+        if fields:
+            return sparse_page_json(
+                OrganizationResponse, organizations, next_cursor, fields
+            )
+
+        return Page[OrganizationResponse](
+            items=[OrganizationResponse.model_validate(org) for org in organizations],
+            next_cursor=next_cursor,
+        ).model_dump_json()
+
+    body = await response_cache.get_or_set(
+        key=f"organizations:{current_user.id}:{limit}:{cursor}:{','.join(fields or [])}",
+        tags=tags,
+        compute=render,
+    )
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/{organization_id}", response_model=OrganizationResponse)
 async def get_organization(
     organization_id: UUID,
-    db: DBSessionDep,
+    organization_manager: ReadOrganizationManagerDep,
+    fields: Optional[List[str]] = Depends(sparse_fields(OrganizationResponse)),
     current_user: UserResponse = Depends(get_current_user),
-) -> OrganizationResponse:
-    """Get organization details."""
-    # This endpoint likely needs significant rework to use SQLAlchemy session
-    # Replace below with SQLAlchemy logic
-    # organization_manager = OrganizationManager()
-    # organization = await organization_manager.get_by_id(organization_id)
-
-    # Placeholder logic
-    # TODO: Replace with actual SQLAlchemy query logic and auth check
-    stmt = select(OrganizationModel).where(OrganizationModel.id == organization_id)
-    result = await db.execute(stmt)
-    org_model = result.scalars().first()
-
-    if not org_model:
+) -> Response:
+    """Get organization details; only members can see an organization."""
+    # Authorized from the in-memory membership index; non-members get the
+    # same 404 as for a missing organization
+    if not await membership_index.is_member(
+        current_user.id, organization_id, load_memberships
+    ):
         raise HTTPException(status_code=404, detail="Organization not found")
 
-    # TODO: Add authorization check - does current_user have access to org_model?
+    async def render() -> str:
+        org_model = await organization_manager.get_by_id(organization_id, fields=fields)
+
+        if not org_model:
+            raise HTTPException(status_code=404, detail="Organization not found")
 
-    return OrganizationResponse.model_validate(org_model)
+        if fields:
+            return sparse_json(OrganizationResponse, org_model, fields)
+
+        return OrganizationResponse.model_validate(org_model).model_dump_json()
+
+    body = await response_cache.get_or_set(
+        # Shared by all members, as the access check happens above
+        key=f"organization:{organization_id}:{','.join(fields or [])}",
+        tags=[f"org:{organization_id}"],
+        compute=render,
+    )
+    return Response(content=body, media_type="application/json")
 
 
 @router.put("/{organization_id}", response_model=OrganizationResponse)
 async def update_organization(
     organization_id: UUID,
     organization_update: OrganizationUpdate,
-    db: DBSessionDep,
+    organization_manager: OrganizationManagerDep,
     current_user: UserResponse = Depends(get_current_user),
 ) -> OrganizationResponse:
     """Update organization details."""
-    # This endpoint likely needs significant rework to use SQLAlchemy session
-    # Replace below with SQLAlchemy logic
-    # organization_manager = OrganizationManager()
-    # organization, error = await organization_manager.update_organization(
-    #     organization_id, organization_update
-    # )
-
-    # Placeholder logic
-    # TODO: Replace with actual SQLAlchemy query logic and auth check
-    update_data = organization_update.model_dump(exclude_unset=True)
-
-    if not update_data:
+    if not organization_update.model_dump(
+        exclude_unset=True, exclude=SERVER_MANAGED_FIELDS
+    ):
         raise HTTPException(status_code=400, detail="No update data provided")
 
-    # Fetch the existing organization first (includes auth check placeholder)
-    stmt_select = select(OrganizationModel).where(
-        OrganizationModel.id == organization_id
+    # Only members may update; the check runs within the UPDATE statement
+    organization, error = await organization_manager.update_organization(
+        organization_id, organization_update, user_id=current_user.id
     )
-    result_select = await db.execute(stmt_select)
-    org_model = result_select.scalars().first()
-
-    if not org_model:
-        raise HTTPException(status_code=404, detail="Organization not found")
-
-    # TODO: Add authorization check - does current_user have access to org_model?
-
-    # Update the organization
-    for key, value in update_data.items():
-        setattr(org_model, key, value)
-
-    db.add(org_model)  # Add the updated model to the session
-    await db.flush()
-    await db.refresh(org_model)
-
-    # Simulate error handling path for completeness
-    error = None  # Placeholder
-    if error:
-        raise HTTPException(status_code=400, detail=error)
+    if error or not organization:
+        detail = error.get("error") if error else "Failed to update organization"
+        status_code = 404 if detail == "Organization not found" else 400
+        raise HTTPException(status_code=status_code, detail=detail)
 
-    return OrganizationResponse.model_validate(org_model)
+    return OrganizationResponse.model_validate(organization)
@@ -1,18 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional, Union
 
-from app.api.dependencies import get_current_user, verify_auth_request
-from app.managers.user_manager import UserManager
+from fastapi import APIRouter, Depends, HTTPException, Response
+
+from app.api.dependencies import (
+    sparse_fields,
+    UserManagerDep,
+    get_current_user,
+    verify_auth_request,
+)
 from app.schemas.user import UserResponse
+from app.utils.fields import sparse_json
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.post("/sync", response_model=UserResponse)
 async def sync_user(
+    user_manager: UserManagerDep,
     clerk_id: str = Depends(verify_auth_request),
 ) -> UserResponse:
     """Sync user data from Clerk."""
-    user_manager = UserManager()
     user_model = await user_manager.sync_user_from_clerk(clerk_id)
 
     if not user_model:
@@ -21,6 +28,14 @@ async def sync_user(
     return UserResponse.model_validate(user_model)
 
 
-@router.get("/me")
-async def get_me(user: UserResponse = Depends(get_current_user)) -> UserResponse:
+@router.get("/me", response_model=UserResponse)
+async def get_me(
+    fields: Optional[List[str]] = Depends(sparse_fields(UserResponse)),
+    user: UserResponse = Depends(get_current_user),
+) -> Union[UserResponse, Response]:
+    if fields:
+        return Response(
+            content=sparse_json(UserResponse, user, fields),
+            media_type="application/json",
+        )
     return user
@@ -0,0 +1,61 @@
+import json
+import logging
+
+from fastapi import APIRouter, HTTPException, Request, status
+from redis.exceptions import RedisError
+
+from app.core.clients import clients
+from app.core.config import settings
+from app.core.webhooks import WebhookVerificationError, webhook_verifier
+from app.services.clerk_webhooks import USER_EVENTS
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/webhooks", tags=["webhooks"])
+
+
+@router.post("/clerk", status_code=status.HTTP_202_ACCEPTED)
+async def clerk_webhook(request: Request) -> dict[str, str]:
+    """Receive a Clerk webhook and queue user events for the consumer.
+
+    Events are only verified and enqueued here; the database is updated by
+    the background consumer, so the endpoint answers Clerk quickly.
+    """
+    body = await request.body()
+    try:
+        webhook_verifier.verify(request.headers, body)
+    except WebhookVerificationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    try:
+        event = json.loads(body)
+        event_type = event["type"]
+        data = event["data"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Malformed webhook payload"
+        )
+
+    if event_type not in USER_EVENTS:
+        return {"status": "ignored"}
+
+    # Svix may deliver events out of order; the consumer orders them by when
+    # Clerk created them (ms), falling back to when Svix sent the message
+    timestamp = event.get("timestamp") or int(request.headers["svix-timestamp"]) * 1000
+
+    try:
+        await clients.redis.xadd(
+            settings.CLERK_WEBHOOK_STREAM,
+            {"type": event_type, "data": json.dumps(data), "timestamp": str(timestamp)},
+            maxlen=settings.CLERK_WEBHOOK_STREAM_MAXLEN,
+            approximate=True,
+        )
+    except RedisError as e:
+        # A non-2xx response makes Svix retry the delivery later
+        logger.error("Error queueing Clerk webhook: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Could not queue webhook",
+        )
+
+    return {"status": "queued"}
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+import jwt
+from cryptography.hazmat.primitives.serialization import load_pem_public_key
+from fastapi import Request
+from jwt.algorithms import RSAAlgorithm
+
+from app.core.config import settings
+from app.core.timing import timed
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Minimum delay between JWKS fetches triggered by unknown `kid` headers, so
+# that forged tokens cannot make us hammer Clerk's API.
+JWKS_MISS_REFRESH_INTERVAL = 30.0
+
+
+class TokenVerificationError(Exception):
+    """Raised when a Clerk session token cannot be verified."""
+
+
+def get_session_token(request: Request) -> Optional[str]:
+    """Extract the Clerk session token from the Authorization header or cookie."""
+    authorization = request.headers.get("Authorization")
+    if authorization:
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            return token.strip()
+    return request.cookies.get("__session")
+
+
+class ClerkTokenVerifier:
+    """Verify Clerk session JWTs locally against a cached JWKS.
+
+    Signing keys are fetched once and refreshed in the background when they go
+    stale or when a token carries an unknown `kid`. Verified claims are kept in
+    a bounded LRU keyed by the token hash until the token's `exp`, so repeated
+    requests with the same session token skip signature verification.
+    """
+
+    def __init__(
+        self,
+        jwks_url: str,
+        secret_key: str,
+        jwt_key: Optional[str] = None,
+        authorized_parties: Optional[List[str]] = None,
+        jwks_ttl: float = 3600,
+        cache_size: int = 10000,
+        leeway: float = 5,
+    ) -> None:
+        self.jwks_url = jwks_url
+        self.secret_key = secret_key
+        self.authorized_parties = authorized_parties or []
+        self.jwks_ttl = jwks_ttl
+        self.leeway = leeway
+        self._static_key = self._load_pem_key(jwt_key)
+        self._keys: Dict[str, Any] = {}
+        self._keys_fetched_at = 0.0
+        self._last_fetch_attempt = 0.0
+        self._refresh_task: Optional[asyncio.Task[None]] = None
+        self._tokens: TTLCache[str, Dict[str, Any]] = TTLCache(maxsize=cache_size)
+        self._http: Optional[httpx.AsyncClient] = None
+
+    @staticmethod
+    def _load_pem_key(jwt_key: Optional[str]) -> Any:
+        """Load the networkless PEM key, if one is configured and valid."""
+        if not jwt_key:
+            return None
+        try:
+            return load_pem_public_key(jwt_key.encode())
+        except ValueError:
+            return None
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """Verify a session token and return its claims."""
+        with timed("auth"):
+            return await self._verify(token)
+
+    async def _verify(self, token: str) -> Dict[str, Any]:
+        cache_key = hashlib.sha256(token.encode()).hexdigest()
+        claims = self._tokens.get(cache_key)
+        if claims is not None:
+            return claims
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError as e:
+            raise TokenVerificationError(f"Malformed token: {str(e)}") from e
+
+        key = await self._get_signing_key(header.get("kid"))
+        try:
+            claims = jwt.decode(
+                token,
+                key=key,
+                algorithms=["RS256"],
+                leeway=self.leeway,
+                options={"require": ["exp", "sub"]},
+            )
+        except jwt.PyJWTError as e:
+            raise TokenVerificationError(str(e)) from e
+
+        if self.authorized_parties and claims.get("azp") not in self.authorized_parties:
+            raise TokenVerificationError(
+                f"Invalid authorized party: {claims.get('azp')}"
+            )
+
+        self._tokens.set(cache_key, claims, expires_at=float(claims["exp"]))
+        return claims
+
+    async def _get_signing_key(self, kid: Optional[str]) -> Any:
+        """Resolve the key for a `kid`, refreshing the JWKS on a miss."""
+        if self._keys and time.time() - self._keys_fetched_at > self.jwks_ttl:
+            # Serve the stale keys while a refresh runs in the background
+            self._schedule_refresh()
+
+        key = self._keys.get(kid) if kid else None
+        if key is None and kid and self._can_refresh_on_miss():
+            await asyncio.shield(self._schedule_refresh())
+            key = self._keys.get(kid)
+
+        if key is None:
+            key = self._static_key
+        if key is None:
+            raise TokenVerificationError(f"No signing key found for kid {kid}")
+        return key
+
+    def _can_refresh_on_miss(self) -> bool:
+        refresh_running = (
+            self._refresh_task is not None and not self._refresh_task.done()
+        )
+        return (
+            refresh_running
+            or time.time() - self._last_fetch_attempt > JWKS_MISS_REFRESH_INTERVAL
+        )
+
+    def _schedule_refresh(self) -> asyncio.Task[None]:
+        """Start a JWKS refresh unless one is already in flight."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._fetch_jwks())
+        return self._refresh_task
+
+    async def _fetch_jwks(self) -> None:
+        self._last_fetch_attempt = time.time()
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=5.0)
+
+        try:
+            response = await self._http.get(
+                self.jwks_url,
+                headers={"Authorization": f"Bearer {self.secret_key}"},
+            )
+            response.raise_for_status()
+            keys = {
+                jwk["kid"]: RSAAlgorithm.from_jwk(jwk)
+                for jwk in response.json().get("keys", [])
+                if jwk.get("kid") and jwk.get("kty") == "RSA"
+            }
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            # Keep serving the previous keys; the static key remains a fallback
+            logger.warning("Error fetching Clerk JWKS: %s", e)
+            return
+
+        self._keys = keys
+        self._keys_fetched_at = time.time()
+
+    async def warm(self) -> None:
+        """Prefetch the JWKS so the first requests do not pay for it."""
+        await asyncio.shield(self._schedule_refresh())
+
+    async def close(self) -> None:
+        """Cancel pending refreshes and close the HTTP client."""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+# Global instance of the token verifier
+token_verifier = ClerkTokenVerifier(
+    jwks_url=settings.CLERK_JWKS_URL,
+    secret_key=settings.CLERK_SECRET_KEY,
+    jwt_key=settings.CLERK_JWKS_KEY,
+    authorized_parties=settings.CLERK_AUTHORIZED_PARTIES,
+    jwks_ttl=settings.CLERK_JWKS_CACHE_TTL,
+    cache_size=settings.AUTH_TOKEN_CACHE_SIZE,
+)
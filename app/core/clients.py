@@ -0,0 +1,80 @@
+from typing import Optional
+
+import httpx
+import redis.asyncio as redis
+from clerk_backend_api import Clerk
+from supabase import AsyncClient
+
+from app.core.config import settings
+from app.utils.redis import init_redis
+from app.utils.supabase import get_supabase_client
+
+
+class ClientRegistry:
+    """Process-wide, pooled clients for external services.
+
+    Clients are created once by the app lifespan (``startup``) and closed on
+    shutdown, so every request reuses the same connection pools instead of
+    building new HTTP clients and paying for fresh TLS handshakes.
+    """
+
+    def __init__(self) -> None:
+        self._supabase: Optional[AsyncClient] = None
+        self._clerk: Optional[Clerk] = None
+        self._redis: Optional[redis.Redis] = None
+        self._http: Optional[httpx.AsyncClient] = None
+
+    async def startup(self) -> None:
+        """Create the shared clients."""
+        self._http = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+        self._supabase = await get_supabase_client()
+        self._clerk = Clerk(
+            bearer_auth=settings.CLERK_SECRET_KEY, async_client=self._http
+        )
+        self._redis = await init_redis()
+
+    async def shutdown(self) -> None:
+        """Close the shared clients."""
+        if self._supabase is not None:
+            await self._supabase.postgrest.aclose()
+        if self._redis is not None:
+            # The client does not own its pool, so drain the pool explicitly
+            await self._redis.aclose()
+            await self._redis.connection_pool.disconnect()
+        if self._http is not None:
+            await self._http.aclose()
+        self._supabase = None
+        self._clerk = None
+        self._redis = None
+        self._http = None
+
+    @property
+    def supabase(self) -> AsyncClient:
+        if self._supabase is None:
+            raise Exception("ClientRegistry is not initialized")
+        return self._supabase
+
+    @property
+    def clerk(self) -> Clerk:
+        if self._clerk is None:
+            raise Exception("ClientRegistry is not initialized")
+        return self._clerk
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None:
+            raise Exception("ClientRegistry is not initialized")
+        return self._http
+
+    @property
+    def redis(self) -> redis.Redis:
+        if self._redis is None:
+            raise Exception("ClientRegistry is not initialized")
+        return self._redis
+
+
+# Global instance of the client registry, initialized in the app lifespan
+clients = ClientRegistry()
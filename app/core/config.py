@@ -1,4 +1,4 @@
-from typing import List, Union, Any
+from typing import Dict, List, Union, Any
 
 from dotenv import load_dotenv
 from pydantic import field_validator
@@ -15,7 +15,12 @@ class Settings(BaseSettings):
         "*.tryaccountable.ai",
     ]
 
-    @field_validator("BACKEND_CORS_ORIGINS", mode="before")
+    @field_validator(
+        "BACKEND_CORS_ORIGINS",
+        "CLERK_AUTHORIZED_PARTIES",
+        "DATABASE_REPLICA_URLS",
+        mode="before",
+    )
     @classmethod
     def assemble_cors_origins(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
         if isinstance(v, str) and not v.startswith("["):
@@ -39,23 +44,122 @@ class Settings(BaseSettings):
             )
         return v
 
+    # Redis connection pool (per worker)
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 2.0  # seconds to wait for a free connection
+    # Must exceed the longest blocking command (webhook consumer blocks 2s)
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 2.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+
     # Supabase settings
     SUPABASE_KEY: str
     SUPABASE_DB_PASSWORD: str
     SUPABASE_PROJECT_ID: str
     SUPABASE_ACCESS_TOKEN: str
     DATABASE_URL: str
+    # Read replicas for read-only sessions, a JSON list of postgresql+asyncpg
+    # URLs; when empty all reads go to DATABASE_URL
+    DATABASE_REPLICA_URLS: List[str] = []
+    # Replicas lagging further behind than this (seconds) are skipped
+    DATABASE_REPLICA_MAX_LAG: float = 5.0
+    DATABASE_REPLICA_CHECK_INTERVAL: float = 5.0  # seconds between lag checks
+
+    # Database connection pool, per worker and per engine (primary, replicas)
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 20
+    DATABASE_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    DATABASE_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DATABASE_POOL_PRE_PING: bool = False
+    # Prepared statements cached per connection (asyncpg and SQLAlchemy)
+    DATABASE_STATEMENT_CACHE_SIZE: int = 100
+    # Set when DATABASE_URL points at a transaction-mode pooler (Supavisor on
+    # port 6543, PgBouncer): statement caches are disabled and prepared
+    # statements get unique names, as consecutive transactions may run on
+    # different server connections
+    DATABASE_POOLER_MODE: bool = False
+    # Open a connection per session and leave pooling to the external pooler
+    DATABASE_NULL_POOL: bool = False
 
     # Clerk settings
     NEXT_PUBLIC_CLERK_PUBLISHABLE_KEY: str
     CLERK_SECRET_KEY: str
     CLERK_JWKS_KEY: str
+    CLERK_JWKS_URL: str = "https://api.clerk.com/v1/jwks"
+    CLERK_JWKS_CACHE_TTL: int = 3600  # seconds before the JWKS is refreshed
+    # Allowed `azp` claims; an empty list disables the check
+    CLERK_AUTHORIZED_PARTIES: List[str] = []
+    # Maximum number of verified session tokens kept in memory per worker
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    # Svix signing secret of the Clerk webhook endpoint (whsec_...)
+    CLERK_WEBHOOK_SECRET: str = ""
+    # Redis stream that buffers verified webhook events for the consumer
+    CLERK_WEBHOOK_STREAM: str = "clerk:webhooks"
+    CLERK_WEBHOOK_STREAM_MAXLEN: int = 100000
+    CLERK_WEBHOOK_BATCH_SIZE: int = 500
+    # Deliveries after which a failing event is moved to the dead-letter stream
+    CLERK_WEBHOOK_MAX_DELIVERIES: int = 10
+
+    # Authenticated user cache (local tier is per worker, Redis tier is shared)
+    USER_CACHE_LOCAL_TTL: int = 5
+    USER_CACHE_REDIS_TTL: int = 300
+    USER_CACHE_SIZE: int = 10000
+
+    # Cached GET responses, invalidated by tag on writes
+    RESPONSE_CACHE_TTL: int = 300
+    # Seconds before expiry at which one request recomputes an entry
+    RESPONSE_CACHE_EARLY_REFRESH: float = 30.0
+
+    # Per-worker index of organization memberships, invalidated over pub/sub
+    MEMBERSHIP_INDEX_SIZE: int = 50000
+    MEMBERSHIP_INDEX_TTL: float = 300.0  # bounds staleness if a publish fails
+    MEMBERSHIP_INVALIDATION_CHANNEL: str = "membership:invalidate"
+
+    # Rate limiting: requests per period by tier. Authenticated users get the
+    # most generous plan of their organizations; unauthenticated requests are
+    # keyed by IP and use the "anonymous" tier.
+    RATE_LIMIT_PERIOD: int = 10
+    RATE_LIMITS: Dict[str, int] = {
+        "anonymous": 20,
+        "free": 20,
+        "pro": 100,
+        "enterprise": 500,
+    }
+    RATE_LIMIT_SYNC_INTERVAL: float = 1.0  # seconds between Redis syncs
+    RATE_LIMIT_PLAN_CACHE_TTL: int = 60
+
+    @field_validator("RATE_LIMITS")
+    @classmethod
+    def check_rate_limits(cls, v: Dict[str, int], field: Any) -> Dict[str, int]:
+        # The limiter falls back to these tiers for anonymous callers and
+        # for unknown plans
+        missing = {"anonymous", "free"} - v.keys()
+        if missing:
+            raise ValueError(
+                f"{field.field_name} must define limits for: {', '.join(sorted(missing))}"
+            )
+        if any(limit < 1 for limit in v.values()):
+            raise ValueError(f"{field.field_name} limits must be positive")
+        return v
+
+    # Health checks
+    HEALTH_CHECK_TIMEOUT: float = 2.0  # seconds allowed per dependency probe
+    HEALTH_CACHE_TTL: float = 5.0  # seconds an aggregate result is reused
 
     # OpenAI settings
     OPENAI_API_KEY: str
 
     # Logging
     LOG_LEVEL: str = "info"
+    # Fraction of successful requests written to the access log (5xx always are)
+    LOG_ACCESS_SAMPLE_RATE: float = 1.0
+
+    # SQL instrumentation
+    SQL_SLOW_QUERY_MS: float = 200.0  # statements slower than this are logged
+    # Warn when one statement runs more than this many times in a request
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10
+    # Return X-DB-Query-Count/-Time-Ms/-Slowest-Query-Ms response headers
+    SQL_STATS_HEADERS: bool = False
 
     @field_validator("LOG_LEVEL")
     @classmethod
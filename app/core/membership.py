@@ -0,0 +1,123 @@
+import asyncio
+import contextlib
+import logging
+from typing import Awaitable, Callable, FrozenSet, Iterable, Optional
+from uuid import UUID
+
+from redis.exceptions import RedisError
+
+from app.core.clients import clients
+from app.core.config import settings
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before resubscribing after losing the invalidation channel
+RESUBSCRIBE_DELAY = 1.0
+
+
+class MembershipIndex:
+    """Per-worker map of user ID to the IDs of the organizations they belong to.
+
+    Entries are loaded from the database on first use. Writers that change
+    memberships call ``invalidate``, which drops the users' entries in this
+    worker and publishes their IDs on a Redis channel that every worker
+    listens to. While a worker is not subscribed (at startup, or after the
+    connection to Redis was lost) it may miss invalidations, so it answers
+    from the database without caching; on (re)subscribing it starts empty.
+    """
+
+    def __init__(self, channel: str, maxsize: int, ttl: float) -> None:
+        self.channel = channel
+        self._organizations: TTLCache[UUID, FrozenSet[UUID]] = TTLCache(maxsize, ttl)
+        # Bumped on every invalidation, so that a load that raced with one is
+        # not cached
+        self._version = 0
+        self._subscribed = False
+        self._listen_task: Optional[asyncio.Task[None]] = None
+
+    async def organizations_of(
+        self,
+        user_id: UUID,
+        load: Callable[[UUID], Awaitable[Iterable[UUID]]],
+    ) -> FrozenSet[UUID]:
+        """Get the organizations a user belongs to, loading them on a miss."""
+        organization_ids = self._organizations.get(user_id)
+        if organization_ids is None:
+            version = self._version
+            organization_ids = frozenset(await load(user_id))
+            if self._subscribed and version == self._version:
+                self._organizations.set(user_id, organization_ids)
+        return organization_ids
+
+    async def is_member(
+        self,
+        user_id: UUID,
+        organization_id: UUID,
+        load: Callable[[UUID], Awaitable[Iterable[UUID]]],
+    ) -> bool:
+        return organization_id in await self.organizations_of(user_id, load)
+
+    async def invalidate(self, user_ids: Iterable[UUID]) -> None:
+        """Drop the users' entries in every worker after their memberships changed."""
+        user_ids = list(user_ids)
+        self._drop(user_ids)
+        try:
+            await clients.redis.publish(
+                self.channel, ",".join(str(user_id) for user_id in user_ids)
+            )
+        except RedisError as e:
+            # Other workers' entries expire after the TTL at the latest
+            logger.warning("Error publishing membership invalidation: %s", e)
+
+    def _drop(self, user_ids: Iterable[UUID]) -> None:
+        self._version += 1
+        for user_id in user_ids:
+            self._organizations.pop(user_id)
+
+    async def start(self) -> None:
+        self._listen_task = asyncio.create_task(self._listen_loop())
+
+    async def close(self) -> None:
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listen_task
+            self._listen_task = None
+
+    async def _listen_loop(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except RedisError as e:
+                logger.warning("Membership invalidation channel lost: %s", e)
+            except Exception:
+                logger.exception("Error listening for membership invalidations")
+            await asyncio.sleep(RESUBSCRIBE_DELAY)
+
+    async def _listen(self) -> None:
+        pubsub = clients.redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(self.channel)
+            # Invalidations may have been missed while unsubscribed
+            self._version += 1
+            self._organizations.clear()
+            self._subscribed = True
+            while True:
+                message = await pubsub.get_message(timeout=1.0)
+                if message is None:
+                    continue
+                user_ids = message["data"].split(",")
+                self._drop(UUID(user_id) for user_id in user_ids if user_id)
+        finally:
+            self._subscribed = False
+            with contextlib.suppress(RedisError):
+                await pubsub.aclose()
+
+
+# Global instance of the membership index, started in the app lifespan
+membership_index = MembershipIndex(
+    channel=settings.MEMBERSHIP_INVALIDATION_CHANNEL,
+    maxsize=settings.MEMBERSHIP_INDEX_SIZE,
+    ttl=settings.MEMBERSHIP_INDEX_TTL,
+)
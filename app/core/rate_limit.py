@@ -0,0 +1,172 @@
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from app.core.clients import clients
+from app.core.config import settings
+from app.core.metrics import rate_limit_rejections
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Tier applied to unauthenticated requests (and failed authentication)
+ANONYMOUS_TIER = "anonymous"
+# Tier for authenticated users whose organizations have no known plan
+DEFAULT_TIER = "free"
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request is over its limit."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"Rate limit exceeded, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class _Bucket:
+    """Per-key limiter state kept by a worker."""
+
+    __slots__ = ("tokens", "updated_at", "window", "window_count", "pending")
+
+    def __init__(self, limit: int, window: int) -> None:
+        self.tokens = float(limit)
+        self.updated_at = time.monotonic()
+        self.window = window
+        # Requests counted by all workers in the window, as of the last sync
+        self.window_count = 0
+        # Requests admitted by this worker and not yet reported to Redis
+        self.pending = 0
+
+
+class HybridRateLimiter:
+    """Rate limiter that decides locally and syncs with Redis in batches.
+
+    Every request is checked against an in-process token bucket (``limit``
+    tokens per ``period``) and against the cluster-wide count of the current
+    fixed window, both held in memory, so the request path never waits on
+    Redis. A background task reports each key's admitted requests to Redis in
+    one pipeline every ``sync_interval`` seconds and reads back the global
+    counts. Across workers a key can therefore exceed its limit by at most
+    what they admit within one sync interval.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        period: int,
+        sync_interval: float = 1.0,
+        plan_cache_ttl: float = 60,
+        namespace: str = "ratelimit",
+    ) -> None:
+        self.limits = limits
+        self.period = period
+        self.sync_interval = sync_interval
+        self.namespace = namespace
+        self._buckets: Dict[str, _Bucket] = {}
+        self._plans: TTLCache[str, str] = TTLCache(maxsize=10000, ttl=plan_cache_ttl)
+        self._sync_task: Optional[asyncio.Task[None]] = None
+
+    def hit(self, key: str, tier: str) -> None:
+        """Admit one request for a key or raise RateLimitExceeded."""
+        limit = self.limits.get(tier, self.limits[DEFAULT_TIER])
+        now = time.time()
+        window = int(now // self.period)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(limit, window)
+        elif bucket.window != window:
+            # Requests not yet reported belonged to the previous window
+            bucket.window = window
+            bucket.window_count = 0
+            bucket.pending = 0
+
+        if bucket.window_count + bucket.pending >= limit:
+            rate_limit_rejections.inc(tier)
+            raise RateLimitExceeded((window + 1) * self.period - now)
+
+        monotonic = time.monotonic()
+        bucket.tokens = min(
+            limit,
+            bucket.tokens + (monotonic - bucket.updated_at) * limit / self.period,
+        )
+        bucket.updated_at = monotonic
+        if bucket.tokens < 1:
+            rate_limit_rejections.inc(tier)
+            raise RateLimitExceeded((1 - bucket.tokens) * self.period / limit)
+
+        bucket.tokens -= 1
+        bucket.pending += 1
+
+    async def plan_for(
+        self, clerk_id: str, load_plans: Callable[[str], Awaitable[List[str]]]
+    ) -> str:
+        """Return the most generous plan among a user's organizations."""
+        plan = self._plans.get(clerk_id)
+        if plan is None:
+            known = [name for name in await load_plans(clerk_id) if name in self.limits]
+            plan = max(known, key=self.limits.__getitem__, default=DEFAULT_TIER)
+            self._plans.set(clerk_id, plan)
+        return plan
+
+    async def start(self) -> None:
+        self._sync_task = asyncio.create_task(self._sync_loop())
+
+    async def close(self) -> None:
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._sync_task
+            self._sync_task = None
+        await self.sync()
+
+    async def sync(self) -> None:
+        """Report admitted requests to Redis and refresh the global counts."""
+        now = time.monotonic()
+        batch: List[Tuple[str, _Bucket, int, int]] = []
+        for key, bucket in list(self._buckets.items()):
+            if bucket.pending:
+                batch.append((key, bucket, bucket.window, bucket.pending))
+            elif now - bucket.updated_at > self.period:
+                # Idle and fully refilled; the state can be rebuilt on demand
+                del self._buckets[key]
+        if not batch:
+            return
+
+        try:
+            async with clients.redis.pipeline(transaction=False) as pipe:
+                for key, _, window, pending in batch:
+                    counter = f"{self.namespace}:{key}:{window}"
+                    pipe.incrby(counter, pending)
+                    pipe.expire(counter, self.period * 2)
+                results = await pipe.execute()
+        except RedisError as e:
+            # Keep the pending counts and report them on the next sync
+            logger.warning("Error syncing rate limits: %s", e)
+            return
+
+        for (_, bucket, window, pending), count in zip(batch, results[::2]):
+            if bucket.window == window:
+                bucket.pending -= pending
+                bucket.window_count = count
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning("Error syncing rate limits: %s", e)
+
+
+# Global instance of the rate limiter, started in the app lifespan
+rate_limiter = HybridRateLimiter(
+    limits=settings.RATE_LIMITS,
+    period=settings.RATE_LIMIT_PERIOD,
+    sync_interval=settings.RATE_LIMIT_SYNC_INTERVAL,
+    plan_cache_ttl=settings.RATE_LIMIT_PLAN_CACHE_TTL,
+)
@@ -0,0 +1,115 @@
+import contextlib
+import logging
+import random
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, MutableMapping, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import (
+    dependency_call_duration,
+    http_request_duration,
+    http_requests,
+)
+
+access_logger = logging.getLogger("app.access")
+
+# Nanoseconds spent per phase during the current request, None outside one
+_phases: ContextVar[Optional[Dict[str, int]]] = ContextVar("phases", default=None)
+
+
+def record(phase: str, duration_ns: int) -> None:
+    """Add time spent in a phase to the current request's Server-Timing.
+
+    The duration is also observed in the dependency latency histogram, inside
+    or outside of a request.
+    """
+    dependency_call_duration.observe(duration_ns / 1e9, phase)
+    phases = _phases.get()
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0) + duration_ns
+
+
+@contextlib.contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Record the time spent in the block (including awaits) under a phase."""
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter_ns() - start)
+
+
+def server_timing(phases: MutableMapping[str, int], total_ns: int) -> str:
+    """Format phases as a Server-Timing header value (durations in ms)."""
+    entries: List[str] = [
+        f"{phase};dur={duration / 1e6:.3f}" for phase, duration in phases.items()
+    ]
+    entries.append(f"total;dur={total_ns / 1e6:.3f}")
+    return ", ".join(entries)
+
+
+class TimingMiddleware:
+    """Time each HTTP request and report per-phase Server-Timing entries.
+
+    Phases (``auth``, ``db``, ``redis``, ...) are recorded with ``timed`` or
+    ``record`` by the code that runs them and collected in a context variable
+    for the duration of the request. The header carries what was recorded up
+    to the start of the response. Request counts and latency are recorded in
+    the metrics registry, and a sample of requests is written to the access
+    log.
+    """
+
+    def __init__(self, app: ASGIApp, access_log_sample_rate: float = 1.0) -> None:
+        self.app = app
+        self.access_log_sample_rate = access_log_sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter_ns()
+        phases: Dict[str, int] = {}
+        token = _phases.set(phases)
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                header = server_timing(phases, time.perf_counter_ns() - start)
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", header.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _phases.reset(token)
+            duration = (time.perf_counter_ns() - start) / 1e9
+            # Label by route template, not path, to keep cardinality bounded
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            http_requests.inc(scope["method"], route_path, str(status_code))
+            http_request_duration.observe(duration, scope["method"], route_path)
+            # Server errors are always logged; the rest are sampled
+            if access_logger.isEnabledFor(logging.INFO) and (
+                status_code >= 500 or random.random() < self.access_log_sample_rate
+            ):
+                access_logger.info(
+                    "%s %s %s %.5fs",
+                    scope["method"],
+                    scope["path"],
+                    status_code,
+                    duration,
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status_code,
+                        "duration_ms": round(duration * 1000, 3),
+                    },
+                )
@@ -0,0 +1,147 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from sqlalchemy import Connection, Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import db_queries_per_request
+from app.core.timing import record
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.db.slow_queries")
+
+
+class QueryStats:
+    """SQL statements executed while handling one request."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ns = 0
+        self.slowest_ns = 0
+        self.slowest_statement: Optional[str] = None
+        self.shapes: Counter[str] = Counter()
+
+
+_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def _redact(parameters: Any, executemany: bool) -> Any:
+    """Describe bound parameters by type only, so values never reach the logs."""
+    if executemany:
+        return f"<{len(parameters)} parameter sets>"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _query_started(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    context.query_started_ns = time.perf_counter_ns()
+
+
+def _query_finished(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    duration_ns = time.perf_counter_ns() - context.query_started_ns
+    # Report time spent in queries as the request's "db" Server-Timing phase
+    record("db", duration_ns)
+
+    if duration_ns >= settings.SQL_SLOW_QUERY_MS * 1e6:
+        slow_query_logger.warning(
+            "Slow query (%.1fms): %s",
+            duration_ns / 1e6,
+            statement,
+            extra={
+                "duration_ms": round(duration_ns / 1e6, 3),
+                "parameters": _redact(parameters, executemany),
+            },
+        )
+
+    stats = _stats.get()
+    if stats is None:
+        return
+    stats.count += 1
+    stats.total_ns += duration_ns
+    if duration_ns > stats.slowest_ns:
+        stats.slowest_ns = duration_ns
+        stats.slowest_statement = statement
+    # Statements are already parameterized, so the text is the query's shape
+    stats.shapes[statement] += 1
+    if stats.shapes[statement] == settings.SQL_N_PLUS_ONE_THRESHOLD + 1:
+        logger.warning(
+            "Possible N+1 query: statement ran more than %d times in one request: %s",
+            settings.SQL_N_PLUS_ONE_THRESHOLD,
+            statement,
+        )
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement run by the engine and attribute it to the request."""
+    event.listen(engine, "before_cursor_execute", _query_started)
+    event.listen(engine, "after_cursor_execute", _query_finished)
+
+
+class QueryStatsMiddleware:
+    """Collect per-request SQL statistics.
+
+    The statement count per route is recorded in the metrics registry and,
+    when ``headers`` is set, the count, total and slowest statement time are
+    returned in ``X-DB-*`` response headers.
+    """
+
+    def __init__(self, app: ASGIApp, headers: bool = False) -> None:
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _stats.set(stats)
+
+        async def send_with_stats(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.headers:
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-db-query-count", str(stats.count).encode()),
+                    (b"x-db-query-time-ms", f"{stats.total_ns / 1e6:.3f}".encode()),
+                    (
+                        b"x-db-slowest-query-ms",
+                        f"{stats.slowest_ns / 1e6:.3f}".encode(),
+                    ),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _stats.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            db_queries_per_request.observe(stats.count, route)
+            if stats.count and logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "%d queries in %.1fms, slowest %.1fms: %s",
+                    stats.count,
+                    stats.total_ns / 1e6,
+                    stats.slowest_ns / 1e6,
+                    stats.slowest_statement,
+                )
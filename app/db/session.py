@@ -1,6 +1,27 @@
+import asyncio
 import contextlib
-from typing import Any, AsyncIterator
+import logging
+import time
+import uuid
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
+from sqlalchemy import text
+from sqlalchemy.pool import (
+    AsyncAdaptedQueuePool,
+    ConnectionPoolEntry,
+    NullPool,
+    QueuePool,
+)
 from sqlalchemy.ext.asyncio import (
     AsyncConnection,
     AsyncSession,
@@ -10,6 +31,10 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from app.core.config import settings
+from app.core.metrics import Gauge, db_pool_wait_duration, metrics
+from app.db.instrumentation import instrument_engine
+
+logger = logging.getLogger(__name__)
 
 # Ensure DATABASE_URL is set and uses the asyncpg driver
 if not settings.DATABASE_URL or not settings.DATABASE_URL.startswith(
@@ -18,29 +43,282 @@ if not settings.DATABASE_URL or not settings.DATABASE_URL.startswith(
     raise ValueError(
         "DATABASE_URL must be set in settings and use the 'postgresql+asyncpg' driver"
     )
+if not all(
+    url.startswith("postgresql+asyncpg") for url in settings.DATABASE_REPLICA_URLS
+):
+    raise ValueError("DATABASE_REPLICA_URLS must use the 'postgresql+asyncpg' driver")
+
+# Seconds the replica is behind the primary; 0 when it has replayed all WAL
+# it received (an idle primary would otherwise look like growing lag), and
+# 0 on a server that is not in recovery
+REPLICA_LAG_QUERY = text("""
+    SELECT COALESCE(
+        CASE
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+        END,
+        0
+    )
+    """)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection."""
+
+    # Log under SQLAlchemy's namespace so the pool stays at its WARN default
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.InstrumentedQueuePool"
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter_ns()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait_duration.observe((time.perf_counter_ns() - start) / 1e9)
+
+
+def _prepared_statement_name() -> str:
+    # Unique per statement, so names cannot clash on a server connection that
+    # the pooler shares between clients
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+def engine_kwargs_from_settings() -> dict[str, Any]:
+    """Engine keyword arguments for the pool and pooler settings."""
+    connect_args: dict[str, Any] = {
+        # asyncpg's statement cache and SQLAlchemy's cache around it
+        "statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+    }
+    if settings.DATABASE_POOLER_MODE:
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": _prepared_statement_name,
+        }
+
+    kwargs: dict[str, Any] = {
+        "echo": False,  # Set True for SQL logging
+        "connect_args": connect_args,
+    }
+    if settings.DATABASE_NULL_POOL:
+        kwargs["poolclass"] = NullPool
+    else:
+        kwargs.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE,
+            pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+        )
+    return kwargs
+
+
+def _create_engine(host: str, engine_kwargs: dict[str, Any]) -> AsyncEngine:
+    engine = create_async_engine(host, **engine_kwargs)
+    # Time queries for Server-Timing, per-request stats and the slow-query log
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+class ReadSession(AsyncSession):
+    """Session for reads that returns its connection after every statement.
+
+    A read session would otherwise keep its connection checked out from the
+    first query until the end of the request. Read sessions run in
+    autocommit mode, so giving the connection back to the pool costs no
+    round trip (and under READ COMMITTED each statement used its own
+    snapshot anyway). Results are fully buffered first; loaded objects end
+    up detached from the session with their attributes still loaded.
+    """
+
+    async def execute(self, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await super().execute(*args, **kwargs)
+        finally:
+            await self.close()
+
+    async def scalar(self, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await super().scalar(*args, **kwargs)
+        finally:
+            await self.close()
+
+    async def get(self, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await super().get(*args, **kwargs)
+        finally:
+            await self.close()
+
+    async def get_one(self, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await super().get_one(*args, **kwargs)
+        finally:
+            await self.close()
+
+
+def _create_sessionmaker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        autocommit=False,
+        bind=engine,
+        expire_on_commit=False,  # Recommended for FastAPI
+    )
+
+
+def _create_read_sessionmaker(
+    engine: AsyncEngine,
+) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        bind=engine.execution_options(isolation_level="AUTOCOMMIT"),
+        class_=ReadSession,
+        expire_on_commit=False,
+    )
+
+
+class _Replica:
+    """A read replica engine and its last measured replication lag."""
+
+    def __init__(self, host: str, engine_kwargs: dict[str, Any]) -> None:
+        self.engine = _create_engine(host, engine_kwargs)
+        self.sessionmaker = _create_read_sessionmaker(self.engine)
+        self.name = self.engine.url.render_as_string(hide_password=True)
+        # Seconds behind the primary; None until measured or while unreachable
+        self.lag: Optional[float] = None
 
 
 class DatabaseSessionManager:
-    def __init__(self, host: str, engine_kwargs: dict[str, Any] = {}) -> None:
+    """Sessions on the primary database and, for reads, its replicas.
+
+    Read-only sessions go to a replica whose replication lag, measured in
+    the background every ``lag_check_interval`` seconds, is at most
+    ``max_replica_lag``; when none qualifies (or none is configured) they
+    fall back to the primary. Reads from a replica may therefore miss writes
+    from up to ``max_replica_lag`` seconds ago.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        engine_kwargs: dict[str, Any] = {},
+        replica_hosts: Sequence[str] = (),
+        max_replica_lag: float = 5.0,
+        lag_check_interval: float = 5.0,
+    ) -> None:
         # Initialize the async engine with provided host and kwargs
-        self._engine: AsyncEngine | None = create_async_engine(host, **engine_kwargs)
+        self._engine: AsyncEngine | None = _create_engine(host, engine_kwargs)
         # Initialize the session maker bound to the engine
         self._sessionmaker: async_sessionmaker[AsyncSession] | None = (
-            async_sessionmaker(
-                autocommit=False,
-                bind=self._engine,
-                expire_on_commit=False,  # Recommended for FastAPI
-            )
+            _create_sessionmaker(self._engine)
         )
+        # Read-only sessions on the primary, used when no replica is fresh
+        self._primary_read_sessionmaker: async_sessionmaker[AsyncSession] | None = (
+            _create_read_sessionmaker(self._engine)
+        )
+        self._replicas = [_Replica(url, engine_kwargs) for url in replica_hosts]
+        self._next_replica = 0
+        self.max_replica_lag = max_replica_lag
+        self.lag_check_interval = lag_check_interval
+        self._lag_task: Optional[asyncio.Task[None]] = None
+        self._delayed_tasks: Set[asyncio.Task[None]] = set()
+
+    async def start(self) -> None:
+        """Measure replica lag now and keep it up to date in the background."""
+        if not self._replicas:
+            return
+        await self.check_replicas()
+        self._lag_task = asyncio.create_task(self._lag_loop())
+
+    async def check_replicas(self) -> None:
+        """Measure the replication lag of every replica."""
+        await asyncio.gather(*(self._check_replica(r) for r in self._replicas))
+
+    async def _check_replica(self, replica: _Replica) -> None:
+        async def measure() -> float:
+            async with replica.engine.connect() as conn:
+                return float(await conn.scalar(REPLICA_LAG_QUERY))
+
+        previous = replica.lag
+        # Log when a replica changes state (and any failure during startup)
+        try:
+            replica.lag = await asyncio.wait_for(measure(), self.lag_check_interval)
+        except Exception as e:
+            replica.lag = None
+            if previous is not None or self._lag_task is None:
+                logger.warning("Read replica %s unavailable: %s", replica.name, e)
+            return
+        if replica.lag > self.max_replica_lag and (
+            previous is None or previous <= self.max_replica_lag
+        ):
+            logger.warning(
+                "Read replica %s is %.1fs behind the primary", replica.name, replica.lag
+            )
+
+    async def _lag_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.lag_check_interval)
+            await self.check_replicas()
+
+    def after_replication(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """Run ``callback`` again once a write has reached the usable replicas.
+
+        Caches invalidated after a write may meanwhile be refilled from a
+        replica that has not applied it yet; invalidating them a second time
+        bounds that staleness to the replication delay. Does nothing without
+        replicas.
+        """
+        if not self._replicas:
+            return
+
+        async def run_later() -> None:
+            # A replica is used while its last measured lag is within bounds,
+            # so the lag may grow for up to one check interval unnoticed
+            await asyncio.sleep(self.max_replica_lag + self.lag_check_interval)
+            try:
+                await callback()
+            except Exception:
+                logger.exception("Error running delayed replication callback")
+
+        task = asyncio.create_task(run_later())
+        self._delayed_tasks.add(task)
+        task.add_done_callback(self._delayed_tasks.discard)
+
+    def _read_sessionmaker(self) -> Optional[async_sessionmaker[AsyncSession]]:
+        """Pick the next sufficiently fresh replica, round-robin."""
+        for _ in range(len(self._replicas)):
+            replica = self._replicas[self._next_replica]
+            self._next_replica = (self._next_replica + 1) % len(self._replicas)
+            if replica.lag is not None and replica.lag <= self.max_replica_lag:
+                return replica.sessionmaker
+        return None
+
+    def pool_stats(self) -> Dict[Tuple[str, ...], float]:
+        """Current connection pool usage, for the metrics endpoint."""
+        if self._engine is None or not isinstance(self._engine.pool, QueuePool):
+            return {}
+        pool = self._engine.pool
+        return {
+            ("size",): pool.size(),
+            ("checked_in",): pool.checkedin(),
+            ("checked_out",): pool.checkedout(),
+            ("overflow",): pool.overflow(),
+        }
 
     async def close(self) -> None:
-        """Close the database engine."""
+        """Close the database engines."""
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._lag_task
+            self._lag_task = None
+        for replica in self._replicas:
+            await replica.engine.dispose()
         if self._engine is None:
             # Should not happen if initialized correctly
             return
         await self._engine.dispose()
         self._engine = None
         self._sessionmaker = None
+        self._primary_read_sessionmaker = None
 
     @contextlib.asynccontextmanager
     async def connect(self) -> AsyncIterator[AsyncConnection]:
@@ -56,12 +334,24 @@ class DatabaseSessionManager:
                 raise
 
     @contextlib.asynccontextmanager
-    async def session(self) -> AsyncIterator[AsyncSession]:
-        """Provide a context-managed async database session."""
-        if self._sessionmaker is None:
+    async def session(
+        self, readonly: bool = False, replica: bool = True
+    ) -> AsyncIterator[AsyncSession]:
+        """Provide a context-managed async database session.
+
+        A ``readonly`` session is a ``ReadSession``, served by a read replica
+        when one is fresh enough, unless ``replica`` is False.
+        """
+        if self._sessionmaker is None or self._primary_read_sessionmaker is None:
             raise Exception("DatabaseSessionManager is not initialized")
 
-        session = self._sessionmaker()
+        if readonly:
+            sessionmaker = (
+                replica and self._read_sessionmaker()
+            ) or self._primary_read_sessionmaker
+        else:
+            sessionmaker = self._sessionmaker
+        session = sessionmaker()
         try:
             yield session
             # Optional: commit here if you want the dependency to handle commits
@@ -76,15 +366,21 @@ class DatabaseSessionManager:
 
 
 # Global instance of the session manager
-# Configure engine kwargs here (e.g., pooling, echo)
 sessionmanager = DatabaseSessionManager(
     settings.DATABASE_URL,
-    {
-        "echo": False,  # Set True for SQL logging
-        "pool_size": 10,  # Example pool size
-        "max_overflow": 20,  # Example overflow
-        "pool_recycle": 1800,  # Example recycle time (30 mins)
-    },
+    engine_kwargs_from_settings(),
+    replica_hosts=settings.DATABASE_REPLICA_URLS,
+    max_replica_lag=settings.DATABASE_REPLICA_MAX_LAG,
+    lag_check_interval=settings.DATABASE_REPLICA_CHECK_INTERVAL,
+)
+
+metrics.register(
+    Gauge(
+        "db_pool_connections",
+        "SQLAlchemy connection pool usage by state.",
+        sessionmanager.pool_stats,
+        ("state",),
+    )
 )
 
 
@@ -92,3 +388,9 @@ sessionmanager = DatabaseSessionManager(
 async def get_db_session() -> AsyncIterator[AsyncSession]:
     async with sessionmanager.session() as session:
         yield session
+
+
+# FastAPI dependency to get a read-only session, served by a replica if any
+async def get_read_db_session() -> AsyncIterator[AsyncSession]:
+    async with sessionmanager.session(readonly=True) as session:
+        yield session
@@ -1,64 +1,148 @@
-from typing import Any, Dict, Generic, List, Optional, TypeVar
+from typing import Any, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar
 from uuid import UUID
 
-from supabase import Client
+from sqlalchemy import ColumnElement, Select, delete, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
-from app.utils.supabase import get_supabase_client
+from app.models.base import BaseModel
+from app.utils.pagination import decode_cursor, encode_cursor
 
-T = TypeVar("T")
+T = TypeVar("T", bound=BaseModel)
 
 
 class BaseManager(Generic[T]):
-    """Base manager class for Supabase operations."""
+    """Base manager class for SQLAlchemy repository operations."""
 
-    def __init__(self, table_name: str):
-        self.client: Client = get_supabase_client()
-        self.table_name = table_name
+    model: Type[T]
 
-    async def get_by_id(self, id: UUID) -> Optional[Dict[str, Any]]:
-        """Get a record by ID."""
-        result = (
-            self.client.table(self.table_name).select("*").eq("id", str(id)).execute()
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def _column_values(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop keys that are not columns of the model's table."""
+        columns = self.model.__table__.columns
+        return {key: value for key, value in data.items() if key in columns}
+
+    def _project(
+        self, query: Select[Tuple[T]], fields: Optional[Sequence[str]]
+    ) -> Select[Tuple[T]]:
+        """Only load the requested columns (plus the keyset columns)."""
+        if not fields:
+            return query
+
+        columns = self.model.__table__.columns
+        attributes = [getattr(self.model, name) for name in fields if name in columns]
+        return query.options(
+            load_only(self.model.id, self.model.created_at, *attributes)
+        )
+
+    async def get_by_id(
+        self, id: UUID, fields: Optional[Sequence[str]] = None
+    ) -> Optional[T]:
+        """Get a record by ID, optionally loading only some columns."""
+        query = select(self.model).where(self.model.id == id)
+        result = await self.session.scalars(self._project(query, fields))
+        return result.first()
+
+    async def get_by_ids(self, ids: Sequence[UUID]) -> Dict[UUID, T]:
+        """Get the records with the given IDs in one query, keyed by ID."""
+        if not ids:
+            return {}
+        result = await self.session.scalars(
+            select(self.model).where(self.model.id.in_(ids))
         )
-        if result.data and len(result.data) > 0:
-            return result.data[0]
-        return None
+        return {record.id: record for record in result.all()}
 
     async def get_many(
         self,
         filters: Optional[Dict[str, Any]] = None,
         limit: int = 100,
         offset: int = 0,
-    ) -> List[Dict[str, Any]]:
+    ) -> List[T]:
         """Get multiple records with optional filtering."""
-        query = (
-            self.client.table(self.table_name).select("*").limit(limit).offset(offset)
-        )
+        query = select(self.model).limit(limit).offset(offset)
 
         if filters:
-            for key, value in filters.items():
-                query = query.eq(key, value)
+            query = query.filter_by(**filters)
+
+        result = await self.session.scalars(query)
+        return list(result.all())
+
+    async def get_page(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[T], Optional[str]]:
+        """Get a page of records ordered by (created_at, id).
 
-        result = query.execute()
-        return result.data if result.data else []
+        Returns the records and the cursor for the next page, which is None
+        once the last page has been reached. Raises InvalidCursorError for a
+        malformed cursor.
+        """
+        query = select(self.model)
 
-    async def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        if filters:
+            query = query.filter_by(**filters)
+
+        return await self._paginate(query, limit, cursor, fields)
+
+    async def _paginate(
+        self,
+        query: Select[Tuple[T]],
+        limit: int,
+        cursor: Optional[str],
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[T], Optional[str]]:
+        """Apply keyset pagination on (created_at, id) to a query of the model."""
+        query = self._project(query, fields)
+        keyset = tuple_(self.model.created_at, self.model.id)
+        if cursor:
+            created_at, id = decode_cursor(cursor)
+            query = query.where(keyset > tuple_(created_at, id))
+
+        # Fetch one extra row to know whether another page follows
+        query = query.order_by(self.model.created_at, self.model.id).limit(limit + 1)
+        result = await self.session.scalars(query)
+        records = list(result.all())
+
+        if len(records) <= limit:
+            return records, None
+
+        records = records[:limit]
+        last = records[-1]
+        return records, encode_cursor(last.created_at, last.id)
+
+    async def create(self, data: Dict[str, Any]) -> T:
         """Create a new record."""
-        result = self.client.table(self.table_name).insert(data).execute()
-        if result.data and len(result.data) > 0:
-            return result.data[0]
-        return {}
-
-    async def update(self, id: UUID, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Update an existing record."""
-        result = (
-            self.client.table(self.table_name).update(data).eq("id", str(id)).execute()
+        result = await self.session.scalars(
+            insert(self.model).values(**self._column_values(data)).returning(self.model)
         )
-        if result.data and len(result.data) > 0:
-            return result.data[0]
-        return None
+        record = result.one()
+        await self.session.commit()
+        return record
+
+    async def update(
+        self, id: UUID, data: Dict[str, Any], *where: ColumnElement[bool]
+    ) -> Optional[T]:
+        """Update an existing record, if it also matches any extra criteria."""
+        result = await self.session.scalars(
+            update(self.model)
+            .where(self.model.id == id, *where)
+            .values(**self._column_values(data))
+            .returning(self.model)
+        )
+        record = result.first()
+        await self.session.commit()
+        return record
 
     async def delete(self, id: UUID) -> bool:
         """Delete a record by ID."""
-        result = self.client.table(self.table_name).delete().eq("id", str(id)).execute()
-        return bool(result.data)
+        result = await self.session.execute(
+            delete(self.model).where(self.model.id == id).returning(self.model.id)
+        )
+        deleted = result.first() is not None
+        await self.session.commit()
+        return deleted
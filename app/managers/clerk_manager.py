@@ -1,47 +1,133 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
 from types import TracebackType
-from clerk_backend_api import AuthenticateRequestOptions, Clerk, RequestState
-from fastapi import Request
+import httpx
+from clerk_backend_api import Clerk, models
+from clerk_backend_api.utils import BackoffStrategy, RetryConfig
 
-from app.core.config import settings
+from app.core.clients import clients
+from app.core.timing import timed
+
+logger = logging.getLogger(__name__)
+
+# Backs off on 5xx responses when paging through the user list (the SDK does
+# not retry 429s; list_users handles those)
+LIST_RETRY_CONFIG = RetryConfig(
+    "backoff",
+    BackoffStrategy(
+        initial_interval=500, max_interval=30000, exponent=2, max_elapsed_time=300000
+    ),
+    True,
+)
+
+# Backoff for rate-limited (429) user list requests, in seconds
+LIST_RATE_LIMIT_DELAY = 0.5
+LIST_RATE_LIMIT_MAX_DELAY = 30.0
+LIST_RATE_LIMIT_MAX_ELAPSED = 300.0
+
+
+def _retry_after(response: Optional[httpx.Response]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, if it has a number of them."""
+    if response is None:
+        return None
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
 
 
 class ClerkManager:
     """Manager for Clerk operations using the official SDK."""
 
-    def __init__(self) -> None:
-        self.client = Clerk(bearer_auth=settings.CLERK_SECRET_KEY)
+    def __init__(self, client: Optional[Clerk] = None) -> None:
+        self.client = client if client is not None else clients.clerk
 
     async def get_user(self, clerk_id: str) -> Optional[Dict[str, Any]]:
         """Get user data from Clerk."""
         try:
-            response = await self.client.users.get_async(user_id=clerk_id)
+            with timed("clerk"):
+                response = await self.client.users.get_async(user_id=clerk_id)
             if not response:
                 return None
 
-            # Extract necessary user data
-            email_obj = (
-                next(
-                    (email for email in response.email_addresses if email.id),
-                    None,
+            return self.to_user_data(response)
+
+        except Exception:
+            logger.exception("Error getting user from Clerk")
+            return None
+
+    async def list_users(self, limit: int, offset: int) -> List[Dict[str, Any]]:
+        """List user data from Clerk, oldest first so offsets stay stable.
+
+        Rate-limited requests are retried with backoff, honouring Retry-After.
+        """
+        delay = LIST_RATE_LIMIT_DELAY
+        deadline = time.monotonic() + LIST_RATE_LIMIT_MAX_ELAPSED
+        while True:
+            try:
+                with timed("clerk"):
+                    response = await self.client.users.list_async(
+                        request={
+                            "limit": limit,
+                            "offset": offset,
+                            "order_by": "+created_at",
+                        },
+                        retries=LIST_RETRY_CONFIG,
+                    )
+                break
+            except models.SDKError as e:
+                if e.status_code != 429 or time.monotonic() >= deadline:
+                    raise
+                retry_after = _retry_after(e.raw_response)
+                wait = retry_after if retry_after is not None else delay
+                logger.warning(
+                    "Clerk rate limited listing users at offset %d, retrying in %.1fs",
+                    offset,
+                    wait,
                 )
-                if response.email_addresses
-                else None
+                await asyncio.sleep(wait)
+                delay = min(delay * 2, LIST_RATE_LIMIT_MAX_DELAY)
+        return [self.to_user_data(user) for user in response or []]
+
+    @staticmethod
+    def to_user_data(user: models.User) -> Dict[str, Any]:
+        """Extract the fields we store from a Clerk user."""
+        email_obj = (
+            next(
+                (email for email in user.email_addresses if email.id),
+                None,
             )
+            if user.email_addresses
+            else None
+        )
 
-            return {
-                "clerk_id": response.id,
-                "email": email_obj.email_address if email_obj else "",
-                "first_name": response.first_name or "",
-                "last_name": response.last_name or "",
-                "avatar_url": response.profile_image_url,
-            }
+        return {
+            "clerk_id": user.id,
+            "email": email_obj.email_address if email_obj else "",
+            "first_name": user.first_name or "",
+            "last_name": user.last_name or "",
+            "avatar_url": user.profile_image_url,
+        }
 
-        except Exception as e:
-            print(f"Error getting user from Clerk: {str(e)}")
-            return None
+    @staticmethod
+    def event_user_data(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the fields we store from a webhook's user payload."""
+        email_obj = next(
+            (email for email in data.get("email_addresses") or [] if email.get("id")),
+            None,
+        )
+
+        return {
+            "clerk_id": data["id"],
+            "email": email_obj["email_address"] if email_obj else "",
+            "first_name": data.get("first_name") or "",
+            "last_name": data.get("last_name") or "",
+            "avatar_url": data.get("profile_image_url") or data.get("image_url"),
+        }
 
     def __enter__(self) -> "ClerkManager":
         return self
@@ -53,11 +139,3 @@ class ClerkManager:
         exc_tb: TracebackType | None,
     ) -> None:
         pass
-
-    def authenticate_request(self, request: Request) -> RequestState:
-        return self.client.authenticate_request(
-            request,  # type: ignore[arg-type]
-            AuthenticateRequestOptions(
-                jwt_key=settings.CLERK_JWKS_KEY,
-            ),
-        )
@@ -1,84 +1,208 @@
-from typing import Any, Dict, Optional, Tuple
-from uuid import UUID
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID, uuid4
 
+from sqlalchemy import exists, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.membership import membership_index
+from app.db.session import sessionmanager
 from app.managers.base_manager import BaseManager
 from app.schemas.organization import OrganizationCreate, OrganizationUpdate
 from app.models.organization import Organization
+from app.models.organization_member import OrganizationMember
+from app.models.user import User
+from app.utils.cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+# Columns only the server sets (billing decides the plan); values sent by
+# clients for them are ignored
+SERVER_MANAGED_FIELDS = {"plan"}
 
 
 class OrganizationManager(BaseManager[Organization]):
     """Manager for organization operations."""
 
-    def __init__(self) -> None:
-        super().__init__(table_name="organizations")
+    model = Organization
 
-    async def create_organization(
-        self, organization_create: OrganizationCreate, user_id: UUID
-    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, str]]]:
-        """Create a new organization with the given user as admin."""
-        try:
-            # Check if slug is already taken
-            existing = await self.get_by_slug(organization_create.slug)
-            if existing:
-                return None, {"error": "Organization with this slug already exists"}
+    def __init__(self, session: AsyncSession) -> None:
+        super().__init__(session)
 
-            # Create the organization
-            org_data = organization_create.dict()
-            organization = await self.create(org_data)
+    @staticmethod
+    async def _invalidate(tags: List[str], member_ids: Sequence[UUID] = ()) -> None:
+        """Drop cached responses and memberships affected by a write.
 
-            if not organization:
-                return None, {"error": "Failed to create organization"}
+        Runs again once the write has replicated, in case a cache was
+        refilled from a lagging replica in the meantime.
+        """
+
+        async def invalidate() -> None:
+            await response_cache.invalidate_tags(tags)
+            if member_ids:
+                await membership_index.invalidate(member_ids)
+
+        await invalidate()
+        sessionmanager.after_replication(invalidate)
 
-            # Set the user as the admin
-            await self.client.table("organization_members").insert(
-                {"organization_id": organization["id"], "user_id": str(user_id)}
-            ).execute()
+    async def create_organization(
+        self, organization_create: OrganizationCreate, user_id: UUID
+    ) -> Tuple[Optional[Organization], Optional[Dict[str, str]]]:
+        """Create a new organization with the given user as admin.
+
+        The organization and its membership row are inserted by a single
+        statement (two data-modifying CTEs), so creation takes one round trip
+        and either both rows exist or neither does. Conflicts are reported by
+        the database's unique constraints rather than checked up front.
+        New organizations always start on the free plan.
+        """
+        try:
+            org_data = self._column_values(
+                organization_create.model_dump(exclude=SERVER_MANAGED_FIELDS)
+            )
+            new_organization = (
+                insert(Organization)
+                .values(id=uuid4(), plan="free", **org_data)
+                .returning(*Organization.__table__.columns)
+                .cte("new_organization")
+            )
+            new_member = (
+                insert(OrganizationMember)
+                .from_select(
+                    ["id", "organization_id", "user_id"],
+                    select(
+                        literal(uuid4(), OrganizationMember.id.type),
+                        new_organization.c.id,
+                        literal(user_id, OrganizationMember.user_id.type),
+                    ),
+                )
+                .cte("new_member")
+            )
+            result = await self.session.scalars(
+                select(Organization).from_statement(
+                    select(new_organization).add_cte(new_member)
+                )
+            )
+            organization = result.one()
+            await self.session.commit()
+            await self._invalidate([f"member:{user_id}"], member_ids=[user_id])
 
             return organization, None
 
+        except IntegrityError:
+            await self.session.rollback()
+            return None, {"error": "Organization conflicts with existing data"}
         except Exception as e:
+            await self.session.rollback()
             return None, {"error": str(e)}
 
-    async def get_by_slug(self, slug: str) -> Optional[Dict[str, Any]]:
-        """Get an organization by its slug."""
-        result = (
-            self.client.table(self.table_name).select("*").eq("slug", slug).execute()
-        )
-        if result.data and len(result.data) > 0:
-            return result.data[0]
-        return None
-
     async def update_organization(
-        self, organization_id: UUID, organization_update: OrganizationUpdate
-    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, str]]]:
-        """Update an organization's details."""
+        self,
+        organization_id: UUID,
+        organization_update: OrganizationUpdate,
+        user_id: Optional[UUID] = None,
+    ) -> Tuple[Optional[Organization], Optional[Dict[str, str]]]:
+        """Update an organization's details.
+
+        With a ``user_id``, only an organization the user is a member of is
+        updated. The membership check is part of the single
+        ``UPDATE ... RETURNING`` statement, and a non-member gets the same
+        "not found" error as for a missing organization.
+        """
         try:
-            # Check if new slug is already taken (if slug is being updated)
-            if organization_update.slug:
-                existing = await self.get_by_slug(organization_update.slug)
-                if existing and str(existing["id"]) != str(organization_id):
-                    return None, {"error": "Organization with this slug already exists"}
-
-            # Update the organization
-            update_data = organization_update.dict(exclude_unset=True)
-            organization = await self.update(organization_id, update_data)
+            update_data = organization_update.model_dump(
+                exclude_unset=True, exclude=SERVER_MANAGED_FIELDS
+            )
+            if not update_data:
+                return None, {"error": "No update data provided"}
+            criteria = []
+            if user_id is not None:
+                criteria.append(
+                    exists().where(
+                        OrganizationMember.organization_id == Organization.id,
+                        OrganizationMember.user_id == user_id,
+                    )
+                )
+            organization = await self.update(organization_id, update_data, *criteria)
 
             if not organization:
                 return None, {"error": "Organization not found"}
 
+            await self._invalidate([f"org:{organization_id}"])
             return organization, None
 
-        except Exception as e:
-            return None, {"error": str(e)}
+        except IntegrityError:
+            # e.g. a null name; the database message would expose the SQL
+            await self.session.rollback()
+            return None, {"error": "Organization update violates a constraint"}
+        except Exception:
+            await self.session.rollback()
+            logger.exception("Error updating organization %s", organization_id)
+            return None, {"error": "Failed to update organization"}
+
+    async def get_user_organizations_page(
+        self,
+        user_id: UUID,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[Organization], Optional[str]]:
+        """Get a page of the organizations a user administers."""
+        query = (
+            select(Organization)
+            .join(OrganizationMember)
+            .where(OrganizationMember.user_id == user_id)
+        )
+        return await self._paginate(query, limit, cursor, fields)
+
+    async def get_organization_ids(self, user_id: UUID) -> List[UUID]:
+        """Get the IDs of the organizations a user is a member of."""
+        result = await self.session.scalars(
+            select(OrganizationMember.organization_id).where(
+                OrganizationMember.user_id == user_id
+            )
+        )
+        return list(result.all())
+
+    async def get_plans_by_clerk_id(self, clerk_id: str) -> List[str]:
+        """Get the plans of the organizations a user (by Clerk ID) administers."""
+        result = await self.session.scalars(
+            select(Organization.plan)
+            .join(OrganizationMember)
+            .join(User)
+            .where(User.clerk_id == clerk_id)
+        )
+        return list(result.all())
 
     async def get_organization_admin(self, organization_id: UUID) -> Optional[UUID]:
         """Get the admin user ID for an organization."""
-        result = (
-            self.client.table("organization_members")
-            .select("user_id")
-            .eq("organization_id", str(organization_id))
-            .execute()
+        result = await self.session.scalars(
+            select(OrganizationMember.user_id).where(
+                OrganizationMember.organization_id == organization_id
+            )
+        )
+        return result.first()
+
+    async def get_organization_admins(
+        self, organization_ids: Sequence[UUID]
+    ) -> Dict[UUID, UUID]:
+        """Get the admin user IDs of several organizations, keyed by organization."""
+        if not organization_ids:
+            return {}
+        result = await self.session.execute(
+            select(
+                OrganizationMember.organization_id, OrganizationMember.user_id
+            ).where(OrganizationMember.organization_id.in_(organization_ids))
         )
-        if result.data and len(result.data) > 0:
-            return UUID(result.data[0]["user_id"])
-        return None
+        return {organization_id: user_id for organization_id, user_id in result.all()}
+
+
+async def load_memberships(user_id: UUID) -> List[UUID]:
+    """Load a user's organization IDs for the membership index.
+
+    Read from the primary: the result is cached, and a lagging replica read
+    right after a user created an organization would hide it from them.
+    """
+    async with sessionmanager.session(readonly=True, replica=False) as session:
+        return await OrganizationManager(session).get_organization_ids(user_id)
@@ -1,104 +1,304 @@
-from typing import Any, Dict, List, Optional
-from uuid import UUID
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID, uuid4
 
+from redis.exceptions import RedisError
+from sqlalchemy import delete, exists, func, or_, select, union_all
+from sqlalchemy.dialects.postgresql import Insert, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.clients import clients
+from app.core.config import settings
+from app.db.session import sessionmanager
 from app.managers.base_manager import BaseManager
 from app.managers.clerk_manager import ClerkManager
+from app.models.organization import Organization
+from app.models.organization_member import OrganizationMember
 from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import UserCreate, UserResponse, UserUpdate
+from app.utils.cache import TwoTierCache
+
+logger = logging.getLogger(__name__)
+
+# Authenticated user lookups by Clerk ID; writes below invalidate entries
+user_cache: TwoTierCache[UserResponse] = TwoTierCache(
+    namespace="user:clerk",
+    model=UserResponse,
+    local_ttl=settings.USER_CACHE_LOCAL_TTL,
+    redis_ttl=settings.USER_CACHE_REDIS_TTL,
+    maxsize=settings.USER_CACHE_SIZE,
+)
+
+# Columns owned by Clerk and kept in sync by sync_user_from_clerk
+CLERK_PROFILE_FIELDS = ("email", "first_name", "last_name", "avatar_url")
+PROFILE_HASH_PREFIX = "user:clerk-profile"
+PROFILE_HASH_TTL = 24 * 60 * 60
+
+
+async def _invalidate_users(clerk_ids: Sequence[str]) -> None:
+    """Drop cached lookups for users whose rows changed."""
+
+    async def invalidate() -> None:
+        await user_cache.invalidate_many(clerk_ids)
+
+    await invalidate()
+    sessionmanager.after_replication(invalidate)
+
+
+async def _forget_profile_hashes(clerk_ids: Sequence[str]) -> None:
+    """Drop the synced profile hashes of users whose rows were written elsewhere."""
+    if not clerk_ids:
+        return
+    try:
+        await clients.redis.delete(
+            *(f"{PROFILE_HASH_PREFIX}:{clerk_id}" for clerk_id in clerk_ids)
+        )
+    except RedisError as e:
+        logger.warning("Error writing Clerk profile hash: %s", e)
+
+
+def _profile_hash(clerk_user: Dict[str, Any]) -> str:
+    """Content hash of the Clerk profile fields we store."""
+    profile = {field: clerk_user.get(field) for field in CLERK_PROFILE_FIELDS}
+    return hashlib.sha256(json.dumps(profile, sort_keys=True).encode()).hexdigest()
+
+
+async def _get_profile_hash(clerk_id: str) -> Optional[str]:
+    try:
+        return await clients.redis.get(f"{PROFILE_HASH_PREFIX}:{clerk_id}")
+    except RedisError as e:
+        logger.warning("Error reading Clerk profile hash: %s", e)
+        return None
+
+
+async def _set_profile_hash(clerk_id: str, profile_hash: Optional[str]) -> None:
+    """Store the hash of the last synced profile, or forget it if None."""
+    key = f"{PROFILE_HASH_PREFIX}:{clerk_id}"
+    try:
+        if profile_hash is None:
+            await clients.redis.delete(key)
+        else:
+            await clients.redis.set(key, profile_hash, ex=PROFILE_HASH_TTL)
+    except RedisError as e:
+        logger.warning("Error writing Clerk profile hash: %s", e)
+
+
+def _on_profile_conflict(stmt: Insert) -> Insert:
+    """Update the Clerk-owned fields on a Clerk ID conflict, only if they differ.
+
+    Skipping unchanged rows keeps the updated_at trigger from firing.
+    """
+    columns = User.__table__.columns
+    return stmt.on_conflict_do_update(
+        index_elements=[User.clerk_id],
+        set_={
+            **{field: stmt.excluded[field] for field in CLERK_PROFILE_FIELDS},
+            "updated_at": func.now(),
+        },
+        where=or_(
+            *(
+                columns[field].is_distinct_from(stmt.excluded[field])
+                for field in CLERK_PROFILE_FIELDS
+            )
+        ),
+    )
 
 
 class UserManager(BaseManager[User]):
     """Manager for user operations."""
 
-    def __init__(self) -> None:
-        super().__init__("users")
+    model = User
+
+    def __init__(
+        self, session: AsyncSession, clerk_manager: Optional[ClerkManager] = None
+    ) -> None:
+        super().__init__(session)
+        self.clerk_manager = clerk_manager
 
-    async def get_user_by_clerk_id(self, clerk_id: str) -> Optional[Dict[str, Any]]:
+    async def get_user_by_clerk_id(self, clerk_id: str) -> Optional[User]:
         """Get a user by their Clerk ID."""
-        result = (
-            self.client.table(self.table_name)
-            .select("*")
-            .eq("clerk_id", clerk_id)
-            .execute()
+        result = await self.session.scalars(
+            select(User).where(User.clerk_id == clerk_id)
         )
-        if result.data and len(result.data) > 0:
-            return result.data[0]
-        return None
+        return result.first()
+
+    async def get_users_by_clerk_ids(self, clerk_ids: Sequence[str]) -> Dict[str, User]:
+        """Get the users with the given Clerk IDs in one query, keyed by Clerk ID."""
+        if not clerk_ids:
+            return {}
+        result = await self.session.scalars(
+            select(User).where(User.clerk_id.in_(clerk_ids))
+        )
+        return {user.clerk_id: user for user in result.all()}
 
-    async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+    async def get_user_by_email(self, email: str) -> Optional[User]:
         """Get a user by their email."""
-        result = (
-            self.client.table(self.table_name).select("*").eq("email", email).execute()
+        result = await self.session.scalars(select(User).where(User.email == email))
+        return result.first()
+
+    async def upsert_user(self, user_data: Dict[str, Any]) -> Optional[User]:
+        """Insert or update a user by Clerk ID in a single statement.
+
+        The row is only written when a Clerk-owned field actually differs, so
+        unchanged profiles do not fire the updated_at trigger. Either way the
+        current row is returned, also when a concurrent sync inserted it.
+        """
+        stmt = pg_insert(User).values(id=uuid4(), **self._column_values(user_data))
+        columns = User.__table__.columns
+        upserted = _on_profile_conflict(stmt).returning(*columns).cte("upserted_user")
+        # The skipped-update case returns no row from the CTE; fall back to the
+        # existing row within the same statement.
+        unchanged = select(*columns).where(
+            User.clerk_id == user_data["clerk_id"],
+            ~exists(select(upserted.c.id)),
         )
-        if result.data and len(result.data) > 0:
-            return result.data[0]
-        return None
+        result = await self.session.scalars(
+            select(User)
+            .from_statement(union_all(select(upserted), unchanged))
+            .execution_options(populate_existing=True)
+        )
+        user = result.first()
+        await self.session.commit()
+        if user is None:
+            # A concurrent upsert inserted the row after this statement's
+            # snapshot was taken: the INSERT conflicted and skipped the update,
+            # but the fallback SELECT could not see the row yet. A new
+            # statement sees the committed row.
+            user = await self.get_user_by_clerk_id(user_data["clerk_id"])
+        return user
+
+    async def upsert_users(self, users_data: Sequence[Dict[str, Any]]) -> int:
+        """Insert or update a batch of users by Clerk ID.
+
+        Rows are sent as one executemany of the same conditional upsert used by
+        upsert_user, which the driver batches into multi-row INSERTs. If the
+        batch violates another constraint (e.g. a duplicate email), it falls
+        back to row-by-row upserts so one bad row does not sink the batch.
+        Returns the number of users synced.
+        """
+        # A statement cannot touch the same conflict target twice; keep the
+        # last occurrence of each Clerk ID.
+        rows = {
+            user_data["clerk_id"]: {"id": uuid4(), **self._column_values(user_data)}
+            for user_data in users_data
+        }
+        if not rows:
+            return 0
+
+        stmt = _on_profile_conflict(pg_insert(User.__table__))
+        try:
+            await self.session.execute(stmt, list(rows.values()))
+            await self.session.commit()
+            synced = list(rows)
+        except IntegrityError:
+            await self.session.rollback()
+            synced = []
+            for clerk_id, row in rows.items():
+                try:
+                    await self.session.execute(stmt, row)
+                    await self.session.commit()
+                    synced.append(clerk_id)
+                except IntegrityError as e:
+                    await self.session.rollback()
+                    logger.warning("Error upserting user %s: %s", clerk_id, e)
+
+        await _invalidate_users(synced)
+        # The rows may no longer match the last profile /users/sync hashed
+        await _forget_profile_hashes(synced)
+        return len(synced)
+
+    async def delete_users_by_clerk_ids(self, clerk_ids: Sequence[str]) -> int:
+        """Delete the users with the given Clerk IDs; returns how many existed."""
+        if not clerk_ids:
+            return 0
+        result = await self.session.execute(
+            delete(User).where(User.clerk_id.in_(clerk_ids)).returning(User.id)
+        )
+        deleted = len(result.all())
+        await self.session.commit()
+
+        await _invalidate_users(clerk_ids)
+        await _forget_profile_hashes(clerk_ids)
+        return deleted
 
-    async def sync_user_from_clerk(self, clerk_id: str) -> Optional[Dict[str, Any]]:
-        """Sync user data from Clerk to Supabase."""
+    async def sync_user_from_clerk(self, clerk_id: str) -> Optional[User]:
+        """Sync user data from Clerk to the database.
+
+        Skips the database write when the Clerk profile hashes the same as the
+        last one synced for this user.
+        """
         try:
             # Get user data from Clerk using ClerkManager
-            with ClerkManager() as clerk:
+            with self.clerk_manager or ClerkManager() as clerk:
                 clerk_user = await clerk.get_user(clerk_id)
-                if not clerk_user:
-                    return None
+            if not clerk_user:
+                return None
 
-                # Check if user already exists in Supabase
+            profile_hash = _profile_hash(clerk_user)
+            if await _get_profile_hash(clerk_id) == profile_hash:
                 existing_user = await self.get_user_by_clerk_id(clerk_id)
-
                 if existing_user:
-                    # Update user if exists
-                    user_data = {
-                        "email": clerk_user["email"],
-                        "first_name": clerk_user["first_name"],
-                        "last_name": clerk_user["last_name"],
-                        "avatar_url": clerk_user["avatar_url"],
-                    }
-                    return await self.update(UUID(existing_user["id"]), user_data)
-                else:
-                    # Create new user
-                    return await self.create(clerk_user)
-
-        except Exception as e:
-            print(f"Error syncing user from Clerk: {str(e)}")
+                    return existing_user
+
+            user = await self.upsert_user(clerk_user)
+            await _invalidate_users([clerk_id])
+            await _set_profile_hash(clerk_id, profile_hash)
+            return user
+
+        except Exception:
+            await self.session.rollback()
+            logger.exception("Error syncing user from Clerk")
             return None
 
-    async def create_user(self, user_create: UserCreate) -> Optional[Dict[str, Any]]:
-        """Create a new user in Supabase."""
+    async def create_user(self, user_create: UserCreate) -> Optional[User]:
+        """Create a new user in the database."""
         try:
             # First check if user already exists
             existing_user = await self.get_user_by_clerk_id(user_create.clerk_id)
             if existing_user:
                 return existing_user
 
-            # Create user in Supabase
-            user_data = user_create.dict()
+            # Create user in the database
+            user_data = user_create.model_dump()
             return await self.create(user_data)
 
-        except Exception as e:
-            print(f"Error creating user: {str(e)}")
+        except Exception:
+            await self.session.rollback()
+            logger.exception("Error creating user")
             return None
 
     async def update_user(
         self, user_id: UUID, user_update: UserUpdate
-    ) -> Optional[Dict[str, Any]]:
-        """Update a user in Supabase."""
+    ) -> Optional[User]:
+        """Update a user in the database."""
         try:
             # Create update data, removing None values
-            update_data = {k: v for k, v in user_update.dict().items() if v is not None}
+            update_data = {
+                k: v for k, v in user_update.model_dump().items() if v is not None
+            }
             if not update_data:
                 return await self.get_by_id(user_id)
 
-            return await self.update(user_id, update_data)
+            user = await self.update(user_id, update_data)
+            if user:
+                await _invalidate_users([user.clerk_id])
+                # The row no longer necessarily matches the last synced profile
+                await _set_profile_hash(user.clerk_id, None)
+            return user
 
-        except Exception as e:
-            print(f"Error updating user: {str(e)}")
+        except Exception:
+            await self.session.rollback()
+            logger.exception("Error updating user")
             return None
 
-    async def get_user_organizations(self, user_id: UUID) -> List[Dict[str, Any]]:
+    async def get_user_organizations(self, user_id: UUID) -> List[Organization]:
         """Get all organizations a user administers."""
-        result = self.client.rpc(
-            "get_user_organizations", {"user_id_param": str(user_id)}
-        ).execute()
-        return result.data if result.data else []
+        result = await self.session.scalars(
+            select(Organization)
+            .join(OrganizationMember)
+            .where(OrganizationMember.user_id == user_id)
+        )
+        return list(result.all())
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import String, Text
+from sqlalchemy import Index, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import List, TYPE_CHECKING
 
@@ -24,5 +24,10 @@ class Organization(BaseModel):
         back_populates="organization", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # Supports keyset pagination ordered by (created_at, id)
+        Index("ix_organizations_created_at_id", "created_at", "id"),
+    )
+
     def __repr__(self) -> str:
         return f"<Organization(id={self.id}, name='{self.name}')>"
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Text
+from sqlalchemy import Index, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import List, TYPE_CHECKING
 
@@ -23,5 +23,10 @@ class User(BaseModel):
         back_populates="user", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # Supports keyset pagination ordered by (created_at, id)
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
+
     def __repr__(self) -> str:
         return f"<User(id={self.id}, email='{self.email}')>"
@@ -0,0 +1,315 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import socket
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from redis.exceptions import ResponseError
+
+from app.core.clients import clients
+from app.core.config import settings
+from app.db.session import sessionmanager
+from app.managers.clerk_manager import ClerkManager
+from app.managers.user_manager import UserManager
+
+logger = logging.getLogger(__name__)
+
+USER_EVENTS = ("user.created", "user.updated", "user.deleted")
+CONSUMER_GROUP = "user-sync"
+# Entries a stopped worker read but never acknowledged are taken over after this
+CLAIM_IDLE_MS = 60_000
+# Delay before retrying failed entries, doubled per consecutive failure
+RETRY_DELAY = 5.0
+MAX_RETRY_DELAY = 300.0
+# How long the last applied event time of a user is remembered; longer than
+# Svix keeps retrying a delivery
+VERSION_TTL = 7 * 24 * 60 * 60
+
+# Only raise a user's version, never lower it (concurrent batches may finish
+# out of order)
+RAISE_VERSION_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tonumber(ARGV[1]) > current then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+end
+"""
+
+StreamEntry = Tuple[str, Optional[Dict[str, str]]]
+
+
+def _stream_id_order(entry_id: str) -> Tuple[int, int]:
+    """Sort key for stream IDs; as strings, "1-10" would sort before "1-9"."""
+    ms, seq = entry_id.split("-")
+    return int(ms), int(seq)
+
+
+class UserEvent(NamedTuple):
+    entry_id: str
+    timestamp: int  # when Clerk created the event, in ms
+    type: str
+    data: Dict[str, Any]
+
+
+class ClerkWebhookConsumer:
+    """Apply queued Clerk user events to the database in coalesced batches.
+
+    Every worker runs a consumer in the same Redis consumer group, so each
+    event is handled by one worker. Svix does not deliver events in order, so
+    a batch keeps only the newest event per Clerk user, and events older than
+    the last one applied for the user (kept in Redis) are dropped; a late
+    ``user.updated`` cannot revert newer data or re-create a deleted user.
+    The rest is written with one upsert and one delete statement.
+
+    Entries are acknowledged after the batch commits. If a batch fails, its
+    events are applied one by one so a bad entry cannot hold up the others;
+    entries that keep failing are moved to a dead-letter stream after
+    ``max_deliveries`` attempts, and malformed entries are dropped.
+    """
+
+    def __init__(
+        self,
+        stream: str,
+        batch_size: int = 500,
+        group: str = CONSUMER_GROUP,
+        block_ms: int = 2000,
+        max_deliveries: int = 10,
+    ) -> None:
+        self.stream = stream
+        self.dead_letter_stream = f"{stream}:dead"
+        self.batch_size = batch_size
+        self.group = group
+        self.block_ms = block_ms
+        self.max_deliveries = max_deliveries
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def start(self) -> None:
+        """Create the consumer group if needed and start consuming."""
+        try:
+            await clients.redis.xgroup_create(
+                self.stream, self.group, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        # Start with our own pending entries ("0"), then switch to new ones (">")
+        last_id = "0"
+        next_claim = 0.0
+        retry_delay = RETRY_DELAY
+        while True:
+            try:
+                if time.monotonic() >= next_claim:
+                    # Take over entries left pending by consumers that are
+                    # gone, e.g. the workers of a previous deploy
+                    if await self._claim():
+                        last_id = "0"
+                    next_claim = time.monotonic() + CLAIM_IDLE_MS / 1000
+
+                response = await clients.redis.xreadgroup(
+                    self.group,
+                    self.consumer,
+                    {self.stream: last_id},
+                    count=self.batch_size,
+                    block=self.block_ms if last_id == ">" else None,
+                )
+                entries: List[StreamEntry] = response[0][1] if response else []
+                if not entries:
+                    last_id = ">"
+                    continue
+
+                if await self._process(entries):
+                    retry_delay = RETRY_DELAY
+                    continue
+                # Some entries are still pending; re-read them after a pause
+                last_id = "0"
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error consuming Clerk webhooks")
+                # Re-read what is still pending once things recover
+                last_id = "0"
+                next_claim = 0.0
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
+
+    async def _claim(self) -> bool:
+        """Claim every entry idle for CLAIM_IDLE_MS; returns whether any were."""
+        claimed = False
+        cursor = "0-0"
+        while True:
+            cursor, entries, *_ = await clients.redis.xautoclaim(
+                self.stream,
+                self.group,
+                self.consumer,
+                min_idle_time=CLAIM_IDLE_MS,
+                start_id=cursor,
+                count=self.batch_size,
+            )
+            claimed = claimed or bool(entries)
+            if cursor == "0-0":
+                return claimed
+
+    async def _process(self, entries: List[StreamEntry]) -> bool:
+        """Apply and acknowledge entries; returns False if some remain pending."""
+        events: List[UserEvent] = []
+        done: List[str] = []
+        for entry_id, fields in entries:
+            event = self._parse(entry_id, fields)
+            if event is None:
+                done.append(entry_id)
+            else:
+                events.append(event)
+
+        failed: List[UserEvent] = []
+        try:
+            await self._apply(events)
+            done.extend(event.entry_id for event in events)
+        except Exception:
+            logger.exception("Error applying Clerk webhook batch, retrying one by one")
+            for event in events:
+                try:
+                    await self._apply([event])
+                    done.append(event.entry_id)
+                except Exception:
+                    logger.exception("Error applying Clerk webhook %s", event.entry_id)
+                    failed.append(event)
+            dead = await self._dead_letter(failed)
+            done.extend(dead)
+            failed = [event for event in failed if event.entry_id not in dead]
+
+        if done:
+            await clients.redis.xack(self.stream, self.group, *done)
+        return not failed
+
+    @staticmethod
+    def _parse(entry_id: str, fields: Optional[Dict[str, str]]) -> Optional[UserEvent]:
+        """Decode a stream entry, or return None if it cannot be applied."""
+        if not fields:
+            # Trimmed from the stream (MAXLEN) while it was pending
+            logger.warning("Dropping trimmed Clerk webhook %s", entry_id)
+            return None
+        try:
+            data = json.loads(fields["data"])
+            clerk_id = data["id"]
+            event_type = fields["type"]
+            # Entries queued before timestamps were recorded sort first
+            timestamp = int(fields.get("timestamp") or data.get("updated_at") or 0)
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Dropping malformed Clerk webhook %s", entry_id)
+            return None
+        if not isinstance(clerk_id, str) or event_type not in USER_EVENTS:
+            logger.warning("Dropping malformed Clerk webhook %s", entry_id)
+            return None
+        return UserEvent(entry_id, timestamp, event_type, data)
+
+    def _version_key(self, clerk_id: str) -> str:
+        return f"{self.stream}:version:{clerk_id}"
+
+    async def _apply(self, events: List[UserEvent]) -> None:
+        # Newer events for the same user supersede older ones
+        latest: Dict[str, UserEvent] = {}
+        for event in events:
+            current = latest.get(event.data["id"])
+            if current is None or event.timestamp >= current.timestamp:
+                latest[event.data["id"]] = event
+        if not latest:
+            return
+
+        # Drop events older than what was already applied for the user
+        clerk_ids = list(latest)
+        applied = await clients.redis.mget(
+            [self._version_key(clerk_id) for clerk_id in clerk_ids]
+        )
+        for clerk_id, version in zip(clerk_ids, applied):
+            if version is not None and latest[clerk_id].timestamp < int(version):
+                del latest[clerk_id]
+
+        upserts = [
+            ClerkManager.event_user_data(event.data)
+            for event in latest.values()
+            if event.type != "user.deleted"
+        ]
+        deletes = [
+            clerk_id
+            for clerk_id, event in latest.items()
+            if event.type == "user.deleted"
+        ]
+
+        async with sessionmanager.session() as session:
+            user_manager = UserManager(session)
+            await user_manager.upsert_users(upserts)
+            await user_manager.delete_users_by_clerk_ids(deletes)
+
+        # Recorded only once written, so a failed batch is not skipped on retry
+        async with clients.redis.pipeline(transaction=False) as pipe:
+            for clerk_id, event in latest.items():
+                pipe.eval(
+                    RAISE_VERSION_SCRIPT,
+                    1,
+                    self._version_key(clerk_id),
+                    event.timestamp,
+                    VERSION_TTL,
+                )
+            await pipe.execute()
+
+    async def _dead_letter(self, events: List[UserEvent]) -> Set[str]:
+        """Move events delivered too often to the dead-letter stream.
+
+        Returns the IDs of the moved entries, which can then be acknowledged.
+        """
+        if not events:
+            return set()
+        ids = {event.entry_id for event in events}
+        pending = await clients.redis.xpending_range(
+            self.stream,
+            self.group,
+            min=min(ids, key=_stream_id_order),
+            max=max(ids, key=_stream_id_order),
+            count=self.batch_size,
+            consumername=self.consumer,
+        )
+        exhausted = {
+            entry["message_id"]
+            for entry in pending
+            if entry["message_id"] in ids
+            and entry["times_delivered"] >= self.max_deliveries
+        }
+        for event in events:
+            if event.entry_id in exhausted:
+                logger.error(
+                    "Moving Clerk webhook %s to %s after %d deliveries",
+                    event.entry_id,
+                    self.dead_letter_stream,
+                    self.max_deliveries,
+                )
+                await clients.redis.xadd(
+                    self.dead_letter_stream,
+                    {
+                        "id": event.entry_id,
+                        "type": event.type,
+                        "data": json.dumps(event.data),
+                        "timestamp": str(event.timestamp),
+                    },
+                )
+        return exhausted
+
+
+# Global instance of the Clerk webhook consumer
+clerk_webhook_consumer = ClerkWebhookConsumer(
+    stream=settings.CLERK_WEBHOOK_STREAM,
+    batch_size=settings.CLERK_WEBHOOK_BATCH_SIZE,
+    max_deliveries=settings.CLERK_WEBHOOK_MAX_DELIVERIES,
+)
@@ -1,10 +1,19 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
 from sqlalchemy import text
 
+from app.core.clients import clients
+from app.core.config import settings
 from app.schemas.health import HealthResponse
+from app.utils.cache import TTLCache
 from app.utils.redis import check_redis_health
 from app.utils.supabase import check_supabase_health
 from app.db.session import sessionmanager  # Import the session manager
 
+logger = logging.getLogger(__name__)
+
 
 async def check_db_connection() -> str:
     """Check the database connection using SQLAlchemy session."""
@@ -14,15 +23,45 @@ async def check_db_connection() -> str:
             await session.execute(text("SELECT 1"))
         return "healthy"
     except Exception as e:
-        print(f"Database connection check failed: {e}")  # Optional: log the error
+        logger.warning("Database connection check failed: %s", e)
         return "unhealthy"
 
 
 class HealthService:
+    """Aggregate dependency health from concurrent, time-boxed probes.
+
+    Probes reuse the shared clients and each gets at most ``timeout`` seconds.
+    The aggregate result is cached for ``cache_ttl`` seconds and concurrent
+    callers share a single in-flight check, so frequent polling costs at most
+    one round of probes per TTL.
+    """
+
+    def __init__(self, timeout: float, cache_ttl: float) -> None:
+        self.timeout = timeout
+        self._cache: TTLCache[str, HealthResponse] = TTLCache(maxsize=1, ttl=cache_ttl)
+        self._lock = asyncio.Lock()
+
     async def check_health(self) -> HealthResponse:
-        redis_status = await check_redis_health()
-        supabase_status = await check_supabase_health()
-        db_status = await check_db_connection()
+        cached = self._cache.get("health")
+        if cached is not None:
+            return cached
+
+        async with self._lock:
+            # Another caller may have refreshed the result while we waited
+            cached = self._cache.get("health")
+            if cached is not None:
+                return cached
+
+            health = await self._run_checks()
+            self._cache.set("health", health)
+            return health
+
+    async def _run_checks(self) -> HealthResponse:
+        redis_status, supabase_status, db_status = await asyncio.gather(
+            self._probe(lambda: check_redis_health(clients.redis)),
+            self._probe(lambda: check_supabase_health(clients.http, clients.supabase)),
+            self._probe(check_db_connection),
+        )
 
         # Overall status is healthy only if all components are healthy
         all_statuses = [redis_status, supabase_status, db_status]
@@ -38,3 +77,18 @@ class HealthService:
             supabase_status=supabase_status,
             db_status=db_status,
         )
+
+    async def _probe(self, check: Callable[[], Awaitable[str]]) -> str:
+        try:
+            return await asyncio.wait_for(check(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            return "timeout"
+        except Exception:
+            # e.g. the shared clients are not initialized
+            return "unhealthy"
+
+
+# Global instance of the health service
+health_service = HealthService(
+    timeout=settings.HEALTH_CHECK_TIMEOUT, cache_ttl=settings.HEALTH_CACHE_TTL
+)
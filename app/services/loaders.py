@@ -0,0 +1,52 @@
+import asyncio
+from typing import Awaitable, Callable, List, Mapping, TypeVar
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.managers.organization_manager import OrganizationManager
+from app.managers.user_manager import UserManager
+from app.models.organization import Organization
+from app.models.user import User
+from app.utils.dataloader import DataLoader
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class Loaders:
+    """Request-scoped DataLoaders for user and organization lookups.
+
+    Lookups made in the same event loop tick are resolved with one `IN (...)`
+    query per loader. All loaders share the request's session, which does not
+    allow concurrent statements, so their batches run one at a time.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self._lock = asyncio.Lock()
+        user_manager = UserManager(session)
+        organization_manager = OrganizationManager(session)
+
+        self.user_by_id: DataLoader[UUID, User] = DataLoader(
+            self._serialized(user_manager.get_by_ids)
+        )
+        self.user_by_clerk_id: DataLoader[str, User] = DataLoader(
+            self._serialized(user_manager.get_users_by_clerk_ids)
+        )
+        self.organization_by_id: DataLoader[UUID, Organization] = DataLoader(
+            self._serialized(organization_manager.get_by_ids)
+        )
+        self.organization_admin: DataLoader[UUID, UUID] = DataLoader(
+            self._serialized(organization_manager.get_organization_admins)
+        )
+
+    def _serialized(
+        self, batch_fn: Callable[[List[K]], Awaitable[Mapping[K, V]]]
+    ) -> Callable[[List[K]], Awaitable[Mapping[K, V]]]:
+        """Wrap a batch function so it holds the session lock while it runs."""
+
+        async def run(keys: List[K]) -> Mapping[K, V]:
+            async with self._lock:
+                return await batch_fn(keys)
+
+        return run
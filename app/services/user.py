@@ -1,34 +1,33 @@
+import logging
 from typing import Optional
-from uuid import UUID
 
-from app.managers.user_manager import UserManager
+from app.managers.user_manager import UserManager, user_cache
 from app.schemas.user import UserResponse
 
+logger = logging.getLogger(__name__)
+
 
 class UserService:
     """Service for user-related operations."""
 
-    def __init__(self) -> None:
-        self.user_manager = UserManager()
+    def __init__(self, user_manager: UserManager) -> None:
+        self.user_manager = user_manager
 
     async def get_user(self, clerk_id: str) -> Optional[UserResponse]:
-        """Get an existing user by Clerk ID."""
+        """Get an existing user by Clerk ID, served from the user cache."""
         try:
-            user = await self.user_manager.get_user_by_clerk_id(clerk_id)
-            if not user:
+            cached_user = await user_cache.get(clerk_id)
+            if cached_user:
+                return cached_user
+
+            user_model = await self.user_manager.get_user_by_clerk_id(clerk_id)
+            if not user_model:
                 return None
 
-            return UserResponse(
-                id=UUID(user["id"]),
-                clerk_id=user["clerk_id"],
-                email=user["email"],
-                first_name=user.get("first_name"),
-                last_name=user.get("last_name"),
-                avatar_url=user.get("avatar_url"),
-                created_at=user["created_at"],
-                updated_at=user["updated_at"],
-            )
-
-        except Exception as e:
-            print(f"Error getting user: {str(e)}")
+            user = UserResponse.model_validate(user_model)
+            await user_cache.set(clerk_id, user)
+            return user
+
+        except Exception:
+            logger.exception("Error getting user")
             return None
@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from pydantic import BaseModel, ValidationError
+from redis.exceptions import RedisError
+
+from app.core.clients import clients
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+M = TypeVar("M", bound=BaseModel)
+
+
+class TTLCache(Generic[K, V]):
+    """In-process LRU cache whose entries expire at a per-entry deadline.
+
+    Deadlines are wall-clock epoch seconds so that entries can be expired at
+    externally provided times (e.g. a JWT ``exp`` claim). The cache is meant to
+    be used from the event loop and is not thread-safe.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[K, Tuple[V, float]]" = OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        """Return the cached value, or None if it is missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.time():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, expires_at: Optional[float] = None) -> None:
+        """Store a value until ``expires_at`` (defaults to now + ttl)."""
+        if expires_at is None:
+            if self.ttl is None:
+                raise ValueError("expires_at is required when the cache has no ttl")
+            expires_at = time.time() + self.ttl
+
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        """Remove a key if present."""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TwoTierCache(Generic[M]):
+    """Pydantic model cache with an in-process tier in front of Redis.
+
+    The local tier absorbs repeated lookups within a worker; the Redis tier is
+    shared by all workers. Invalidation clears Redis and the local tier of the
+    calling worker, so other workers may serve a stale entry for at most
+    ``local_ttl`` seconds. Redis errors degrade to cache misses.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        model: Type[M],
+        local_ttl: float,
+        redis_ttl: int,
+        maxsize: int = 10000,
+    ) -> None:
+        self.namespace = namespace
+        self.model = model
+        self.redis_ttl = redis_ttl
+        self._local: TTLCache[str, M] = TTLCache(maxsize=maxsize, ttl=local_ttl)
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[M]:
+        """Return the cached value from the first tier that has it."""
+        value = self._local.get(key)
+        if value is not None:
+            return value
+
+        try:
+            raw = await clients.redis.get(self._redis_key(key))
+        except RedisError as e:
+            logger.warning("Error reading %s cache: %s", self.namespace, e)
+            return None
+        if raw is None:
+            return None
+
+        try:
+            value = self.model.model_validate_json(raw)
+        except ValidationError as e:
+            # Written by an older schema (or corrupted); recompute it
+            logger.warning("Dropping invalid %s cache entry: %s", self.namespace, e)
+            await self.invalidate(key)
+            return None
+        self._local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: M) -> None:
+        """Store a value in both tiers."""
+        self._local.set(key, value)
+        try:
+            await clients.redis.set(
+                self._redis_key(key), value.model_dump_json(), ex=self.redis_ttl
+            )
+        except RedisError as e:
+            logger.warning("Error writing %s cache: %s", self.namespace, e)
+
+    async def invalidate(self, key: str) -> None:
+        """Drop a key from both tiers."""
+        self._local.pop(key)
+        try:
+            await clients.redis.delete(self._redis_key(key))
+        except RedisError as e:
+            logger.warning("Error invalidating %s cache: %s", self.namespace, e)
+
+    async def invalidate_many(self, keys: Iterable[str]) -> None:
+        """Drop several keys from both tiers with a single Redis round trip."""
+        redis_keys = []
+        for key in keys:
+            self._local.pop(key)
+            redis_keys.append(self._redis_key(key))
+        if not redis_keys:
+            return
+        try:
+            await clients.redis.delete(*redis_keys)
+        except RedisError as e:
+            logger.warning("Error invalidating %s cache: %s", self.namespace, e)
+
+
+class ResponseCache:
+    """Redis cache of serialized responses, invalidated by tag.
+
+    Every entry is stored with the tags it was built from (e.g. ``org:<id>``)
+    and ``invalidate_tags`` drops all entries carrying any of them. To avoid
+    stampedes, concurrent misses for a key within a worker share a single
+    computation, and once an entry is within ``early_refresh`` seconds of
+    expiring one request (elected with a short Redis lock) recomputes it while
+    the others keep getting the cached copy. Redis errors degrade to misses.
+    """
+
+    def __init__(self, namespace: str, ttl: int, early_refresh: float) -> None:
+        self.namespace = namespace
+        self.ttl = ttl
+        self.early_refresh = early_refresh
+        self._inflight: Dict[str, asyncio.Future[str]] = {}
+
+    def _entry_key(self, key: str) -> str:
+        return f"{self.namespace}:entry:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.namespace}:tag:{tag}"
+
+    async def get_or_set(
+        self, key: str, tags: Sequence[str], compute: Callable[[], Awaitable[str]]
+    ) -> str:
+        """Return the cached body for a key, computing and storing it if needed.
+
+        ``tags`` is read after ``compute`` finishes, so compute may extend it
+        with tags that are only known once the response is built.
+        """
+        try:
+            raw = await clients.redis.get(self._entry_key(key))
+        except RedisError as e:
+            logger.warning("Error reading %s cache: %s", self.namespace, e)
+            raw = None
+
+        if raw is not None:
+            refresh_at, _, body = raw.partition(":")
+            if time.time() < float(refresh_at) or not await self._claim_refresh(key):
+                return body
+
+        return await self._compute_once(key, tags, compute)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        """Drop every entry tagged with any of the given tags."""
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        if not tag_keys:
+            return
+        try:
+            async with clients.redis.pipeline(transaction=False) as pipe:
+                for tag_key in tag_keys:
+                    pipe.smembers(tag_key)
+                members = await pipe.execute()
+            entry_keys = set().union(*members)
+            await clients.redis.delete(*entry_keys, *tag_keys)
+        except RedisError as e:
+            logger.warning("Error invalidating %s cache: %s", self.namespace, e)
+
+    async def _compute_once(
+        self, key: str, tags: Sequence[str], compute: Callable[[], Awaitable[str]]
+    ) -> str:
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            body = await compute()
+            await self._store(key, tags, body)
+            future.set_result(body)
+            return body
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            del self._inflight[key]
+
+    async def _store(self, key: str, tags: Sequence[str], body: str) -> None:
+        entry_key = self._entry_key(key)
+        refresh_at = time.time() + max(self.ttl - self.early_refresh, 0)
+        try:
+            async with clients.redis.pipeline(transaction=False) as pipe:
+                pipe.set(entry_key, f"{refresh_at}:{body}", ex=self.ttl)
+                for tag in tags:
+                    # Tag sets outlive the entries they point to
+                    pipe.sadd(self._tag_key(tag), entry_key)
+                    pipe.expire(self._tag_key(tag), self.ttl)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning("Error writing %s cache: %s", self.namespace, e)
+
+    async def _claim_refresh(self, key: str) -> bool:
+        """Elect a single request (across workers) to refresh an entry early."""
+        try:
+            return bool(
+                await clients.redis.set(
+                    f"{self.namespace}:refresh:{key}",
+                    "1",
+                    nx=True,
+                    ex=max(int(self.early_refresh), 1),
+                )
+            )
+        except RedisError:
+            return False
+
+
+# GET responses of the users and organizations endpoints; managers invalidate
+# the tags on writes
+response_cache = ResponseCache(
+    namespace="response",
+    ttl=settings.RESPONSE_CACHE_TTL,
+    early_refresh=settings.RESPONSE_CACHE_EARLY_REFRESH,
+)
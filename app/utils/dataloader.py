@@ -0,0 +1,95 @@
+import asyncio
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+BatchFn = Callable[[List[K]], Awaitable[Mapping[K, V]]]
+
+
+class DataLoader(Generic[K, V]):
+    """Batch and de-duplicate key lookups issued in the same event loop tick.
+
+    Every ``load`` made before the loop gets back to the loader's scheduled
+    dispatch is resolved with a single call to ``batch_fn``, which receives the
+    unique keys and returns a mapping of the keys it found. Results (including
+    misses, as None) are memoized for the loader's lifetime, so a loader should
+    be scoped to a single request.
+    """
+
+    def __init__(self, batch_fn: BatchFn[K, V], max_batch_size: int = 500) -> None:
+        self._batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._futures: Dict[K, asyncio.Future[Optional[V]]] = {}
+        self._queue: List[Tuple[K, asyncio.Future[Optional[V]]]] = []
+        self._tasks: Set[asyncio.Task[None]] = set()
+
+    def load(self, key: K) -> asyncio.Future[Optional[V]]:
+        """Schedule a key for the next batch and return its pending result."""
+        future = self._futures.get(key)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[key] = future
+        self._queue.append((key, future))
+        if len(self._queue) == 1:
+            loop.call_soon(self._dispatch)
+        return future
+
+    async def load_many(self, keys: Iterable[K]) -> List[Optional[V]]:
+        """Load several keys in one batch, preserving their order."""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: K, value: V) -> None:
+        """Seed the loader with an already known value."""
+        if key not in self._futures:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._futures[key] = future
+
+    def clear(self, key: K) -> None:
+        """Forget a memoized key, e.g. after it was written."""
+        self._futures.pop(key, None)
+
+    def _dispatch(self) -> None:
+        queue, self._queue = self._queue, []
+        for start in range(0, len(queue), self.max_batch_size):
+            task = asyncio.create_task(
+                self._resolve(queue[start : start + self.max_batch_size])
+            )
+            # Keep a reference so the task is not garbage collected mid-flight
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(
+        self, batch: List[Tuple[K, asyncio.Future[Optional[V]]]]
+    ) -> None:
+        try:
+            results = await self._batch_fn([key for key, _ in batch])
+        except Exception as e:
+            # Do not memoize failures; a later load retries the key
+            for key, future in batch:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key, future in batch:
+            if not future.done():
+                future.set_result(results.get(key))
@@ -0,0 +1,64 @@
+from copy import copy
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel, ConfigDict, create_model
+
+from app.schemas.pagination import Page
+
+
+class InvalidFieldsError(ValueError):
+    """Raised when a sparse fieldset names fields the schema does not have."""
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[List[str]]:
+    """Parse a comma-separated `fields` value into schema field names.
+
+    Returns None when no projection was requested. Names are de-duplicated
+    and returned in the schema's declaration order.
+    """
+    if not fields:
+        return None
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise InvalidFieldsError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [name for name in schema.model_fields if name in requested]
+
+
+@lru_cache(maxsize=256)
+def sparse_schema(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Build (and memoize) a schema that only declares the given fields."""
+    return create_model(  # type: ignore[call-overload]
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **{
+            name: (
+                schema.model_fields[name].annotation,
+                copy(schema.model_fields[name]),
+            )
+            for name in fields
+        },
+    )
+
+
+def sparse_json(schema: Type[BaseModel], obj: Any, fields: Sequence[str]) -> str:
+    """Serialize only the requested fields of an object to JSON."""
+    model = sparse_schema(schema, tuple(fields))
+    return model.model_validate(obj).model_dump_json()
+
+
+def sparse_page_json(
+    schema: Type[BaseModel],
+    items: Sequence[Any],
+    next_cursor: Optional[str],
+    fields: Sequence[str],
+) -> str:
+    """Serialize a page to JSON, keeping only the requested fields of each item."""
+    model = sparse_schema(schema, tuple(fields))
+    page = Page[model](
+        items=[model.model_validate(item) for item in items],
+        next_cursor=next_cursor,
+    )
+    return page.model_dump_json()
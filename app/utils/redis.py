@@ -1,34 +1,109 @@
+from typing import Any, List, Optional, Tuple
+
 import redis.asyncio as redis
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
-from fastapi_limiter import FastAPILimiter
+from redis.asyncio.client import Pipeline
 
 from app.core.config import settings
+from app.core.timing import timed
+
+# Commands that wait for data server-side; their duration is mostly idle time
+BLOCKING_COMMANDS = frozenset(
+    {
+        "BLMOVE",
+        "BLMPOP",
+        "BLPOP",
+        "BRPOP",
+        "BRPOPLPUSH",
+        "BZMPOP",
+        "BZPOPMAX",
+        "BZPOPMIN",
+        "WAIT",
+    }
+)
+
+
+def is_blocking(args: Tuple[Any, ...]) -> bool:
+    """Whether a command may wait for data, e.g. XREADGROUP with BLOCK."""
+    command = str(args[0]).upper()
+    if command in ("XREAD", "XREADGROUP"):
+        return b"BLOCK" in args
+    return command in BLOCKING_COMMANDS
+
+
+class TimedPipeline(Pipeline):
+    """Pipeline that records its round trip under the ``redis`` phase."""
+
+    async def execute(self, raise_on_error: bool = True) -> List[Any]:
+        with timed("redis"):
+            return await super().execute(raise_on_error)
+
+
+class TimedRedis(redis.Redis):
+    """Redis client that records command time under the ``redis`` phase.
+
+    Blocking commands are not timed: the stream consumer's XREADGROUP BLOCK
+    waits up to its timeout on every idle poll, which would swamp the latency
+    histogram with samples that are not Redis latency.
+    """
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        if is_blocking(args):
+            return await super().execute_command(*args, **options)
+        with timed("redis"):
+            return await super().execute_command(*args, **options)
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: Optional[str] = None
+    ) -> TimedPipeline:
+        return TimedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+def create_redis_pool() -> redis.BlockingConnectionPool:
+    """Create the process-wide Redis connection pool, sized from settings.
+
+    The pool is blocking: once ``REDIS_MAX_CONNECTIONS`` are checked out,
+    callers wait up to ``REDIS_POOL_TIMEOUT`` seconds for a free connection
+    instead of failing immediately.
+    """
+    redis_url = f"redis://{settings.REDISUSER}:{settings.REDISPASSWORD}@{settings.REDISHOST}:{settings.REDISPORT}"
+    return redis.BlockingConnectionPool.from_url(
+        redis_url,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        encoding="utf-8",
+        decode_responses=True,
+    )
 
 
 async def init_redis() -> redis.Redis:
-    """Initialize Redis connections for rate limiting and caching.
+    """Initialize the shared Redis client for rate limiting and caching.
+
+    Every Redis user (rate limiter, response cache, app code) shares one
+    client backed by a single connection pool.
 
     Returns:
         The initialized redis connection object.
     Raises:
         Exception: If the connection fails.
     """
-    redis_url = f"redis://{settings.REDISUSER}:{settings.REDISPASSWORD}@{settings.REDISHOST}:{settings.REDISPORT}"
     try:
-        red = redis.from_url(redis_url, encoding="utf-8", decode_responses=True)
-        await FastAPILimiter.init(red)
+        red = TimedRedis(connection_pool=create_redis_pool())
         FastAPICache.init(RedisBackend(red), prefix="fastapi-cache")
         return red
     except Exception as e:
         raise Exception(f"Redis connection failed: {str(e)}")
 
 
-async def check_redis_health() -> str:
-    """Check Redis connection health."""
-    redis_url = f"redis://{settings.REDISUSER}:{settings.REDISPASSWORD}@{settings.REDISHOST}:{settings.REDISPORT}"
+async def check_redis_health(red: redis.Redis) -> str:
+    """Check Redis health over an existing (pooled) connection."""
     try:
-        red = redis.from_url(redis_url, encoding="utf-8", decode_responses=True)
         await red.ping()
         return "healthy"
     except Exception:
@@ -1,20 +1,27 @@
-from supabase import create_client, Client
+import httpx
+from supabase import AsyncClient, AsyncClientOptions, acreate_client
 
 from app.core.config import settings
+from app.core.timing import timed
 
 
-def get_supabase_client() -> Client:
-    """Get a Supabase client instance."""
-    return create_client(
+async def get_supabase_client() -> AsyncClient:
+    """Get an async Supabase client instance."""
+    return await acreate_client(
         f"https://{settings.SUPABASE_PROJECT_ID}.supabase.co",
         settings.SUPABASE_KEY,
+        options=AsyncClientOptions(auto_refresh_token=False, persist_session=False),
     )
 
 
-async def check_supabase_health() -> str:
-    """Check Supabase connection health."""
+async def check_supabase_health(http: httpx.AsyncClient, client: AsyncClient) -> str:
+    """Check Supabase health by calling its auth health endpoint."""
     try:
-        get_supabase_client()
-        return "healthy"
+        with timed("supabase"):
+            response = await http.get(
+                f"{client.supabase_url}/auth/v1/health",
+                headers={"apikey": settings.SUPABASE_KEY},
+            )
+        return "healthy" if response.is_success else "unhealthy"
     except Exception:
         return "unhealthy"
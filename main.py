@@ -1,30 +1,44 @@
-import logging
-import time
 import contextlib
 
 from dotenv import load_dotenv
 import uvicorn
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_limiter.depends import RateLimiter
 
-from app.api.endpoints import health, organizations, users
+from app.api.dependencies import rate_limit
+from app.api.endpoints import health, metrics, organizations, users, webhooks
+from app.core.auth import token_verifier
+from app.core.clients import clients
 from app.core.config import settings
-from app.utils.redis import init_redis
+from app.core.rate_limit import rate_limiter
+from app.core.log import RequestIdMiddleware, setup_logging
+from app.core.membership import membership_index
+from app.core.timing import TimingMiddleware
+from app.db.instrumentation import QueryStatsMiddleware
 from app.db.session import sessionmanager
+from app.services.clerk_webhooks import clerk_webhook_consumer
 
 
 @contextlib.asynccontextmanager
 async def lifespan(app: FastAPI):
-    await init_redis()
+    await sessionmanager.start()
+    await clients.startup()
+    app.state.redis = clients.redis
+    await token_verifier.warm()
+    await rate_limiter.start()
+    await membership_index.start()
+    await clerk_webhook_consumer.start()
     yield
+    await clerk_webhook_consumer.stop()
+    await membership_index.close()
+    await rate_limiter.close()
+    await token_verifier.close()
+    await clients.shutdown()
     if sessionmanager._engine is not None:
         await sessionmanager.close()
 
 
-app = FastAPI(
-    lifespan=lifespan, dependencies=[Depends(RateLimiter(times=20, seconds=10))]
-)
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,24 +47,23 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(QueryStatsMiddleware, headers=settings.SQL_STATS_HEADERS)
+# Added last so they wrap everything, including CORS; the request ID is
+# assigned first so that the access log line carries it
+app.add_middleware(
+    TimingMiddleware, access_log_sample_rate=settings.LOG_ACCESS_SAMPLE_RATE
+)
+app.add_middleware(RequestIdMiddleware)
 
-logger = logging.getLogger(__name__)
-logging.basicConfig(level=settings.LOG_LEVEL.upper())
+setup_logging(settings.LOG_LEVEL)
 
 
+# Health probes, metrics and signed Clerk webhooks are not rate limited
 app.include_router(health.router)
-app.include_router(users.router)
-app.include_router(organizations.router)
-
-
-@app.middleware("http")
-async def time_request(request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["Server-Timing"] = str(process_time)
-    logger.info(f"{request.method} {round(process_time, 5)}s {request.url}")
-    return response
+app.include_router(metrics.router)
+app.include_router(users.router, dependencies=[Depends(rate_limit)])
+app.include_router(organizations.router, dependencies=[Depends(rate_limit)])
+app.include_router(webhooks.router)
 
 
 def dev():
@@ -8,6 +8,7 @@ This will drop you into an iPython shell with all managers and services pre-impo
 and an asyncio event loop ready to go.
 """
 import asyncio
+import contextlib
 import os
 from uuid import UUID
 
@@ -23,17 +24,28 @@ from app.managers.user_manager import UserManager
 from app.managers.organization_manager import OrganizationManager
 from app.managers.clerk_manager import ClerkManager
 from app.services.user import UserService
+from app.core.clients import clients
+from app.db.session import sessionmanager
 from app.schemas.user import UserCreate, UserUpdate
 from app.schemas.organization import OrganizationCreate, OrganizationUpdate
 
 
+_session_stack = contextlib.AsyncExitStack()
+
+
 async def _async_main():
     """Create instances of managers and services for testing."""
+    # Initialize the shared clients used by managers
+    await clients.startup()
+
+    # Open a database session that stays open for the whole REPL
+    session = await _session_stack.enter_async_context(sessionmanager.session())
+
     # Initialize managers and services
-    user_manager = UserManager()
-    org_manager = OrganizationManager()
     clerk_manager = ClerkManager()
-    user_service = UserService()
+    user_manager = UserManager(session, clerk_manager)
+    org_manager = OrganizationManager(session)
+    user_service = UserService(user_manager)
 
     # Example test data
     test_user_id = (
@@ -45,6 +57,8 @@ async def _async_main():
 
     # Return a dict of objects to expose in the REPL
     return {
+        # Database session
+        "session": session,
         # Managers
         "user_manager": user_manager,
         "org_manager": org_manager,
@@ -89,6 +103,7 @@ def main():
 =====================================
 
 Available objects:
+- Database: session
 - Managers: user_manager, org_manager, clerk_manager
 - Services: user_service
 - Test Data: test_user_id, test_org_id
@@ -107,7 +122,7 @@ Example usage:
     
     # Create an organization
     org = await_it(org_manager.create_organization(
-        OrganizationCreate(name="Test Org", slug="test-org"),
+        OrganizationCreate(name="Test Org"),
         UUID(test_user_id)
     ))
 
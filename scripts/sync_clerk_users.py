@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Bulk sync of all Clerk users into the database.
+Usage:
+    railway run poetry run python scripts/sync_clerk_users.py [--concurrency 4]
+
+Pages through Clerk's user list (oldest first) with a bounded number of
+concurrent requests and writes each window of pages with batched upserts.
+Progress is checkpointed after every window, so an interrupted run picks up
+where it left off; pass --restart to ignore the checkpoint.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from itertools import chain
+
+from app.core.clients import clients
+from app.db.session import sessionmanager
+from app.managers.clerk_manager import ClerkManager
+from app.managers.user_manager import UserManager
+
+# Largest page Clerk's user list endpoint accepts
+MAX_PAGE_SIZE = 500
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=MAX_PAGE_SIZE,
+        help=f"users per Clerk request (max {MAX_PAGE_SIZE})",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Clerk requests in flight at once",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="users per database upsert",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=".clerk_sync_checkpoint.json",
+        help="file recording the Clerk offset reached so far",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="ignore an existing checkpoint and start from the first user",
+    )
+    args = parser.parse_args()
+    if not 1 <= args.page_size <= MAX_PAGE_SIZE:
+        parser.error(f"--page-size must be between 1 and {MAX_PAGE_SIZE}")
+    if args.concurrency < 1 or args.batch_size < 1:
+        parser.error("--concurrency and --batch-size must be positive")
+    return args
+
+
+def load_checkpoint(path):
+    """Return the Clerk offset to resume from."""
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return json.load(f)["offset"]
+
+
+def save_checkpoint(path, offset):
+    """Atomically record the offset of the next unsynced user."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"offset": offset}, f)
+    os.replace(tmp_path, path)
+
+
+async def sync_users(args):
+    offset = 0 if args.restart else load_checkpoint(args.checkpoint)
+    if offset:
+        print(f"Resuming from checkpoint at offset {offset}")
+
+    clerk_manager = ClerkManager()
+    window = args.page_size * args.concurrency
+    synced = 0
+    started = time.monotonic()
+
+    async with sessionmanager.session() as session:
+        user_manager = UserManager(session, clerk_manager)
+        while True:
+            # Fetch the next window of pages concurrently; the manager retries
+            # rate-limited (429) and 5xx responses with backoff.
+            pages = await asyncio.gather(
+                *(
+                    clerk_manager.list_users(args.page_size, page_offset)
+                    for page_offset in range(offset, offset + window, args.page_size)
+                )
+            )
+            users = list(chain.from_iterable(pages))
+            for start in range(0, len(users), args.batch_size):
+                synced += await user_manager.upsert_users(
+                    users[start : start + args.batch_size]
+                )
+
+            offset += len(users)
+            save_checkpoint(args.checkpoint, offset)
+
+            elapsed = time.monotonic() - started
+            rate = synced / elapsed if elapsed else 0.0
+            print(
+                f"Offset {offset}: {synced} users synced this run "
+                f"in {elapsed:.1f}s ({rate:.0f} users/s)"
+            )
+
+            # A short page means we reached the end of the list
+            if any(len(page) < args.page_size for page in pages):
+                break
+
+    print(f"Done: {synced} users synced, next offset {offset}")
+
+
+async def _async_main(args):
+    await clients.startup()
+    try:
+        await sync_users(args)
+    finally:
+        await clients.shutdown()
+        await sessionmanager.close()
+
+
+def main():
+    asyncio.run(_async_main(parse_args()))
+
+
+if __name__ == "__main__":
+    main()